@@ -0,0 +1,62 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+Micro benchmarks for Mobile Strings Toolkit. Run each of them from the
+project root directory, for example:
+
+``python3 -m benchmarks.bench_spreadsheet``
+"""
+
+import time
+
+def synthetic_rows(count, languages):
+    """
+    Create a synthetic spreadsheet (header + data rows) with roughly
+    ``count`` data rows. Rows are mixed between strings, string arrays
+    and quantity strings, just like in a real world sheet.
+    """
+    header = ['type', 'android_id', 'ios_id'] + list(languages) + ['options']
+    rows = [header]
+    quantities = ['zero', 'one', 'two', 'few', 'many', 'other']
+    i = 0
+    while len(rows) <= count:
+        kind = i % 3
+        if kind == 0:
+            key = 'string_%d' % i
+            rows.append(['string', key, key] + ['%s text %d' % (l, i) for l in languages] + ['opt1; opt2'])
+        elif kind == 1:
+            for index in range(4):
+                key = 'array_%d:%d' % (i, index)
+                rows.append(['string-array', key, key] + ['%s item %d' % (l, index) for l in languages] + [''])
+        else:
+            for quantity in quantities:
+                key = 'plural_%d:%s' % (i, quantity)
+                rows.append(['plurals', key, key] + ['%s %s' % (l, quantity) for l in languages] + [''])
+        i += 1
+    return rows[:count + 1]
+
+def measure(function, *args, repeat=3):
+    """Run function several times and return the best wall-clock time in seconds"""
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
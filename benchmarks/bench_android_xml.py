@@ -0,0 +1,85 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+Throughput of the android_xml generator compared with the previous
+implementation, which built a minidom document and pretty printed it.
+"""
+
+import argparse
+import xml.dom.minidom as minidom
+from benchmarks import measure
+from mst.generator import Generator, AndroidXmlGenerator, Escape
+from mst.resources import String, StringArray
+
+class MinidomGenerator(Generator):
+    """Strings and arrays rendered the old way, through a DOM"""
+
+    def init(self):
+        self.doc = minidom.Document()
+        self.root = self.doc.createElement('resources')
+        self.doc.appendChild(self.root)
+
+    def _add_string(self, resource, language):
+        string = self.doc.createElement('string')
+        string.setAttribute('name', resource.key)
+        string.appendChild( self.doc.createTextNode( Escape.escape(resource.get(language)) ) )
+        self.root.appendChild(string)
+
+    def _add_string_array(self, resource, language):
+        array = self.doc.createElement('string-array')
+        array.setAttribute('name', resource.key)
+        for item_text in resource.get_array(language):
+            item = self.doc.createElement('item')
+            item.appendChild( self.doc.createTextNode( Escape.escape(item_text) ) )
+            array.appendChild(item)
+        self.root.appendChild(array)
+
+    @property
+    def output(self):
+        return self.doc.toprettyxml()
+
+def create_generator(generator_class, count):
+    generator = generator_class()
+    resources = []
+    for i in range(count):
+        if i % 4:
+            resource = String('string_%d' % i, ['en'])
+            resource.add('en', "Fish & chips <%d> aren't \"free\"" % i)
+        else:
+            resource = StringArray('array_%d' % i, ['en'])
+            for index in range(4):
+                resource.add('en', index, 'item %d' % index)
+        resources.append(resource)
+    generator.add_resources(resources)
+    return generator
+
+def main():
+    parser = argparse.ArgumentParser(description='android_xml generator benchmark')
+    parser.add_argument('-n', '--resources', type=int, default=100000, help='Number of resources')
+    args = parser.parse_args()
+
+    old = measure(create_generator(MinidomGenerator, args.resources).render, 'en')
+    new = measure(create_generator(AndroidXmlGenerator, args.resources).render, 'en')
+    print('resources: %d' % args.resources)
+    print('minidom:     %.3f s, %8.0f resources/s' % (old, args.resources / old))
+    print('incremental: %.3f s, %8.0f resources/s' % (new, args.resources / new))
+    print('speedup:     %.2fx' % (old / new))
+
+if __name__ == '__main__':
+    main()
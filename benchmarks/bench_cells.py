@@ -0,0 +1,110 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+Memory held by Cell objects read from a large synthetic cells feed. The
+feed is generated and parsed on the fly, so only the cells themselves
+stay alive. Compact cells are compared with cells that keep their feed
+element, which is what Cell used to do. Memory is measured as resident
+set growth (Linux only).
+"""
+
+import argparse
+import gc
+import multiprocessing
+import os
+from mst.gspread.models import Cell
+from mst.gspread.ns import _ns1, ATOM_NS, SPREADSHEET_NS
+from mst.gspread.urls import construct_url
+from mst.gspread.utils import iter_entries
+from mst.test import feeds
+
+class ElementCell(object):
+    """Cell keeping a reference to its feed element, as Cell used to"""
+
+    def __init__(self, worksheet, element):
+        self.element = element
+        cell_elem = element.find(_ns1('cell'))
+        self._row = int(cell_elem.get('row'))
+        self._col = int(cell_elem.get('col'))
+        self.value = cell_elem.text
+
+# Same entry as served by the API, formatting it is much faster than serializing elements
+ENTRY = ('<entry><id>{url}/R{row}C{col}</id><title>{label}</title>'
+         '<link rel="self" type="application/atom+xml" href="{url}/R{row}C{col}"/>'
+         '<link rel="edit" type="application/atom+xml" href="{url}/R{row}C{col}/1"/>'
+         '<gs:cell row="{row}" col="{col}" inputValue="{value}">{value}</gs:cell></entry>')
+
+class SyntheticFeed(object):
+    """File-like cells feed of a sheet with given number of cells"""
+
+    def __init__(self, cells, cols=40):
+        self.__entries = self.__generate(cells, cols)
+        self.__buffer = b''
+
+    def __generate(self, cells, cols):
+        url = construct_url('cells', spreadsheet_id=feeds.SPREADSHEET_KEY, worksheet_id=feeds.WORKSHEET_ID)
+        yield ('<feed xmlns="%s" xmlns:gs="%s">' % (ATOM_NS, SPREADSHEET_NS)).encode()
+        for i in range(cells):
+            row, col = divmod(i, cols)
+            yield ENTRY.format(url=url, row=row + 1, col=col + 1, label=feeds._label(row + 1, col + 1),
+                               value='text %d' % i).encode()
+        yield b'</feed>'
+
+    def read(self, size=-1):
+        while size < 0 or len(self.__buffer) < size:
+            chunk = next(self.__entries, None)
+            if chunk is None:
+                break
+            self.__buffer += chunk
+        if size < 0:
+            size = len(self.__buffer)
+        data, self.__buffer = self.__buffer[:size], self.__buffer[size:]
+        return data
+
+def resident():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+def retained(cell_class, cells):
+    """Resident memory growth after reading cells, in a fresh process"""
+    gc.collect()
+    before = resident()
+    kept = [cell_class(None, entry) for entry in iter_entries(SyntheticFeed(cells))]
+    gc.collect()
+    return resident() - before
+
+def measure_retained(cell_class, cells):
+    with multiprocessing.Pool(1) as pool:
+        return pool.apply(retained, (cell_class, cells))
+
+def main():
+    parser = argparse.ArgumentParser(description='Cell memory benchmark')
+    parser.add_argument('-n', '--cells', type=int, default=1000000, help='Number of cells in the feed')
+    parser.add_argument('-b', '--baseline-cells', type=int, default=100000, help='Number of cells read with element-keeping cells')
+    args = parser.parse_args()
+
+    compact = measure_retained(Cell, args.cells)
+    baseline = measure_retained(ElementCell, args.baseline_cells)
+    print('cells: %d (baseline: %d)' % (args.cells, args.baseline_cells))
+    print('compact cells: %7.1f MB, %5d B/cell' % (compact / 2**20, compact / args.cells))
+    print('element cells: %7.1f MB, %5d B/cell' % (baseline / 2**20 * args.cells / args.baseline_cells, baseline / args.baseline_cells))
+    print('reduction:     %.1fx' % ((baseline / args.baseline_cells) / (compact / args.cells)))
+
+if __name__ == '__main__':
+    main()
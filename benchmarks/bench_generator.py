@@ -0,0 +1,75 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+Measure generation time of text based generators for growing catalogs.
+Time per resource should stay flat as the catalog grows. The old,
+concatenation based rendering is measured for comparison on smaller
+catalogs only, as it gets quadratic.
+"""
+
+import argparse
+from benchmarks import measure
+from mst.generator import Generator, AndroidGenerator, AppleGenerator
+from mst.resources import String
+
+class ConcatenatingGenerator(Generator):
+    """Old rendering strategy: document is grown with += on an attribute"""
+
+    def init(self):
+        self.doc = ''
+
+    def _add_string(self, resource, language):
+        text = resource.get(language)
+        if len(text) > 0:
+            self.doc += '<string name="%s">%s</string>\n' % (resource.key, text)
+
+    @property
+    def output(self):
+        return self.doc
+
+def create_generator(generator_class, count):
+    generator = generator_class()
+    resources = []
+    for i in range(count):
+        resource = String('string_%d' % i, ['en'])
+        resource.add('en', 'English text number %d' % i)
+        resources.append(resource)
+    generator.add_resources(resources)
+    return generator
+
+def main():
+    parser = argparse.ArgumentParser(description='Generator scaling benchmark')
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 500000], help='Catalog sizes')
+    parser.add_argument('--legacy-limit', type=int, default=100000, help='Largest catalog rendered with the old strategy')
+    args = parser.parse_args()
+
+    print('%10s %12s %12s %12s' % ('resources', 'android', 'ios', 'concat'))
+    for size in args.sizes:
+        row = []
+        for generator_class in (AndroidGenerator, AppleGenerator, ConcatenatingGenerator):
+            if generator_class is ConcatenatingGenerator and size > args.legacy_limit:
+                row.append('-')
+                continue
+            generator = create_generator(generator_class, size)
+            elapsed = measure(generator.render, 'en', repeat=1)
+            row.append('%.2f us/res' % (elapsed / size * 1e6))
+        print('%10d %12s %12s %12s' % tuple([size] + row))
+
+if __name__ == '__main__':
+    main()
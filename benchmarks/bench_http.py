@@ -0,0 +1,60 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+Compare per-request latency of one-shot urlopen() calls with requests
+sent by HTTPSession over pooled keep-alive connections. The server is a
+local stand-in, so only the TCP handshake is saved here; against the
+real API each new connection also costs a TLS handshake.
+"""
+
+import argparse
+from urllib.request import urlopen
+from benchmarks import measure
+from mst.gspread.httpsession import HTTPSession
+from mst.test.httpstub import StubServer
+
+def one_shot(url, count):
+    for i in range(count):
+        with urlopen(url) as r:
+            r.read()
+
+def pooled(session, url, count):
+    for i in range(count):
+        session.get(url).read()
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP transport benchmark')
+    parser.add_argument('-n', '--requests', type=int, default=500, help='Number of requests')
+    parser.add_argument('-s', '--size', type=int, default=4096, help='Response body size in bytes')
+    args = parser.parse_args()
+
+    with StubServer(etags=False) as server:
+        server.bodies['/feed'] = b'x' * args.size
+        url = server.url('/feed')
+        session = HTTPSession(max_validators=0)
+        plain = measure(one_shot, url, args.requests)
+        kept = measure(pooled, session, url, args.requests)
+        session.pool.clear()
+    print('requests: %d, body: %d B' % (args.requests, args.size))
+    print('urlopen:   %.1f us/request' % (plain / args.requests * 1e6))
+    print('pooled:    %.1f us/request' % (kept / args.requests * 1e6))
+    print('speedup:   %.2fx' % (plain / kept))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+Compare CSV ingestion backends on a wide, synthetic sheet. Only a dozen
+of columns is required by a build, the rest belongs to languages and
+platforms we do not generate.
+"""
+
+import argparse
+import csv
+import os
+import tempfile
+from benchmarks import synthetic_rows, measure
+from mst import Spreadsheet
+from mst.loader import LoaderCsv
+
+def consume(loader):
+    for row in loader.stream():
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description='CSV loader benchmark')
+    parser.add_argument('-n', '--rows', type=int, default=100000, help='Number of synthetic rows')
+    parser.add_argument('-l', '--languages', type=int, default=80, help='Number of language columns')
+    parser.add_argument('-b', '--build-languages', type=int, default=8, help='Number of languages used by a build')
+    args = parser.parse_args()
+
+    languages = ['l%02d' % i for i in range(args.languages)]
+    columns = Spreadsheet.required_columns('android_id', languages[:args.build_languages])
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    try:
+        with os.fdopen(fd, 'w', newline='') as f:
+            csv.writer(f).writerows( synthetic_rows(args.rows, languages) )
+        size = os.path.getsize(path)
+        plain = measure(consume, LoaderCsv(path, streaming=True))
+        mapped = measure(consume, LoaderCsv(path, backend=LoaderCsv.BACKEND_MMAP, columns=columns))
+    finally:
+        os.remove(path)
+    print('rows: %d, columns: %d, decoded: %d, file: %.1f MB' % (args.rows, len(languages) + 4, len(columns), size / 2**20))
+    print('csv backend:  %.3f s' % plain)
+    print('mmap backend: %.3f s' % mapped)
+    print('speedup:      %.2fx' % (plain / mapped))
+
+if __name__ == '__main__':
+    main()
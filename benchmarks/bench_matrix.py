@@ -0,0 +1,69 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+Compare assembly of the value matrix returned by
+Worksheet.get_all_values() from parsed cells. The old builder kept a
+dict of dicts and materialized the rectangle afterwards; the new one
+fills a matrix allocated once from the extent of the cells.
+"""
+
+import argparse
+import random
+from collections import defaultdict
+from itertools import chain
+from benchmarks import measure
+from mst.gspread.utils import dense_matrix
+
+def dict_matrix(cells):
+    """Matrix builder used by get_all_values() before"""
+    rows = defaultdict(lambda: defaultdict(str))
+    for row, col, value in cells:
+        cells_row = rows.setdefault(row, defaultdict(str))
+        cells_row[col] = value
+
+    all_row_keys = chain.from_iterable(row.keys() for row in rows.values())
+    rect_cols = range(1, max(all_row_keys)+1)
+    rect_rows = range(1, max(rows.keys())+1)
+
+    return [[rows[i][j] for j in rect_cols] for i in rect_rows]
+
+def synthetic_cells(rows, cols, density):
+    """Cells of a sheet in feed order; empty cells are not in the feed"""
+    rnd = random.Random(0)
+    return [(r, c, 'text %d %d' % (r, c)) for r in range(1, rows + 1)
+                                          for c in range(1, cols + 1)
+                                          if rnd.random() < density]
+
+def main():
+    parser = argparse.ArgumentParser(description='Cells matrix assembly benchmark')
+    parser.add_argument('-r', '--rows', type=int, default=25000, help='Number of rows')
+    parser.add_argument('-c', '--cols', type=int, default=40, help='Number of columns')
+    parser.add_argument('-s', '--sparse-density', type=float, default=0.1, help='Share of non-empty cells in sparse sheet')
+    args = parser.parse_args()
+
+    print('sheet: %d x %d = %d cells' % (args.rows, args.cols, args.rows * args.cols))
+    for name, density in [('dense', 1.0), ('sparse', args.sparse_density)]:
+        cells = synthetic_cells(args.rows, args.cols, density)
+        assert dict_matrix(cells) == dense_matrix(cells)
+        old = measure(dict_matrix, cells)
+        new = measure(dense_matrix, cells)
+        print('%-6s (%7d cells): dict of dicts %.3f s, preallocated %.3f s, speedup %.2fx' % (name, len(cells), old, new, old / new))
+
+if __name__ == '__main__':
+    main()
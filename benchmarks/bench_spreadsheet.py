@@ -0,0 +1,83 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+Compare single-pass Spreadsheet parsing with the old approach, where
+each resource type was collected by a separate scan of the data section.
+"""
+
+import argparse
+from benchmarks import synthetic_rows, measure
+from mst import Spreadsheet
+from mst.resources import ResourceText, String, StringArray, QuantityStrings
+
+LANGUAGES = ['en', 'de', 'fr', 'es', 'it', 'pl', 'pt', 'ru']
+
+def three_pass(sheet):
+    """Collect resources the old way: one full scan per resource type"""
+    def texts(row):
+        for lang in sheet.languages:
+            yield lang, ResourceText(row[ sheet.language_column(lang) ], row[ sheet.options_column ].replace(' ', '').split(';'))
+    strings = []
+    arrays = {}
+    plurals = {}
+    for row in sheet.data:
+        if row[ sheet.type_column ] == Spreadsheet.TYPE_STRING and row[ sheet.id_column ]:
+            resource = String(row[ sheet.id_column ], sheet.languages)
+            for lang, text in texts(row):
+                resource.add(lang, text)
+            strings.append(resource)
+    for row in sheet.data:
+        if row[ sheet.type_column ] == Spreadsheet.TYPE_STRING_ARRAY and row[ sheet.id_column ]:
+            key, index = row[ sheet.id_column ].split(':')
+            resource = arrays.get(key)
+            if resource is None:
+                resource = StringArray(key, sheet.languages)
+                arrays[key] = resource
+            for lang, text in texts(row):
+                resource.add(lang, int(index), text)
+    for row in sheet.data:
+        if row[ sheet.type_column ] == Spreadsheet.TYPE_QUANTITY_STRING and row[ sheet.id_column ]:
+            key, quantity = row[ sheet.id_column ].split(':')
+            resource = plurals.get(key)
+            if resource is None:
+                resource = QuantityStrings(key, sheet.languages)
+                plurals[key] = resource
+            for lang, text in texts(row):
+                resource.add_quantity_string(lang, quantity, text)
+    return strings + list( arrays.values() ) + sorted( plurals.values() )
+
+def single_pass(rows):
+    return Spreadsheet('android_id', rows, LANGUAGES).get_all_resources()
+
+def main():
+    parser = argparse.ArgumentParser(description='Spreadsheet parser benchmark')
+    parser.add_argument('-n', '--rows', type=int, default=100000, help='Number of synthetic rows')
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows, LANGUAGES)
+    sheet = Spreadsheet('android_id', rows, LANGUAGES)
+    old = measure(three_pass, sheet)
+    new = measure(single_pass, rows)
+    print('rows: %d, languages: %d' % (args.rows, len(LANGUAGES)))
+    print('three pass:  %.3f s' % old)
+    print('single pass: %.3f s' % new)
+    print('speedup:     %.2fx' % (old / new))
+
+if __name__ == '__main__':
+    main()
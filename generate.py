@@ -22,65 +22,85 @@ from mst import Factory
 from mst import Spreadsheet
 from mst import Log
 from mst import const
+from mst.builder import Builder
+from mst.cache import WorksheetCache
 from mst.exceptions import MstException
 
-print("Mobile String Toolkit generator, v%s\nCopyright (C) 2014 by Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>\n" % const.version)
+def main():
+    print("Mobile String Toolkit generator, v%s\nCopyright (C) 2014 by Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>\n" % const.version)
 
-try:
-    parser = argparse.ArgumentParser(description='')
-    parser.add_argument('-r', '--project-root', required=True, nargs=1, help='Path to project root directory')
-    parser.add_argument('-C', '--csv-loader', nargs=1, metavar='FILE', help='Load data from CSV file')
-    parser.add_argument('-G', '--google-loader', nargs=4, metavar=('EMAIL', 'PASSWORD', 'SPREADSHEET', 'WORKSHEET'), help='Load data from Google Docs spreadsheet')
-    parser.add_argument('-c', '--config', nargs=1, default=['mst.cfg'], help='Configuration file')
-    parser.add_argument('-v',  '--verbose',  action='store_true',  help='Verbose mode')
-    args = parser.parse_args()
+    try:
+        parser = argparse.ArgumentParser(description='')
+        parser.add_argument('-r', '--project-root', required=True, nargs=1, help='Path to project root directory')
+        parser.add_argument('-C', '--csv-loader', nargs=1, metavar='FILE', help='Load data from CSV file')
+        parser.add_argument('-G', '--google-loader', nargs=4, metavar=('EMAIL', 'PASSWORD', 'SPREADSHEET', 'WORKSHEET'), help='Load data from Google Docs spreadsheet')
+        parser.add_argument('--no-cache', action='store_true', help='Always download Google Docs spreadsheet, ignoring local cache')
+        parser.add_argument('-b', '--band-rows', type=int, metavar='N', help='Download Google Docs spreadsheet in bands of N rows, in parallel')
+        parser.add_argument('-M', '--mmap', action='store_true', help='Memory-map CSV file instead of reading it with csv module')
+        parser.add_argument('-c', '--config', nargs=1, default=['mst.cfg'], help='Configuration file')
+        parser.add_argument('-j', '--jobs', type=int, default=1, metavar='N', help='Generate N languages in parallel')
+        parser.add_argument('-i', '--incremental', action='store_true', help='Generate only languages whose translations changed since last run')
+        parser.add_argument('-v',  '--verbose',  action='store_true',  help='Verbose mode')
+        args = parser.parse_args()
 
-    # load configuration from project root
-    config = Config( args.project_root[0],  args.verbose, args.config[0] )
-    Log.init(args.verbose)
+        # load configuration from project root
+        config = Config( args.project_root[0],  args.verbose, args.config[0] )
+        Log.init(args.verbose)
     
-    # create loader - this will also load resources data
-    if args.csv_loader == None and args.google_loader != None:
-        loader = Factory.create_loader( Factory.LOADER_GOOGLEDOCS, args.google_loader )
-    elif args.csv_loader != None and args.google_loader == None:
-        loader = Factory.create_loader( Factory.LOADER_CSV, args.csv_loader )
-    else:
-        raise MstException("""No loader defined in command line. I don't know how to load translations. RTF(riendly)M.""")
+        key_id = Factory.create_key_id(config.generator)
+        columns = Spreadsheet.required_columns(key_id, config.languages)
 
-    key_id = Factory.create_key_id(config.generator)
+        # create loader - this will also load resources data
+        if args.csv_loader == None and args.google_loader != None:
+            cache = None if args.no_cache else WorksheetCache()
+            loader = Factory.create_loader( Factory.LOADER_GOOGLEDOCS, args.google_loader, columns=columns, cache=cache, band_rows=args.band_rows )
+        elif args.csv_loader != None and args.google_loader == None:
+            csv_loader = Factory.LOADER_CSV_MMAP if args.mmap else Factory.LOADER_CSV
+            loader = Factory.create_loader( csv_loader, args.csv_loader, streaming=True, columns=columns )
+        else:
+            raise MstException("""No loader defined in command line. I don't know how to load translations. RTF(riendly)M.""")
 
-    # create a spreadsheet with loaded data
-    sheet = Spreadsheet(key_id, loader.data, config.languages)
+        # create a spreadsheet with loaded data; rows are consumed as they
+        # are read, so the whole data section is never kept in memory
+        sheet = Spreadsheet(key_id, loader.stream(), config.languages)
     
-    # extract resources from the spreadsheet
-    strings = sheet.get_strings()
-    string_arrays = sheet.get_string_arrays()
-    quantity_strings = sheet.get_quantity_strings()
+        # extract resources from the spreadsheet
+        strings = sheet.get_strings()
+        string_arrays = sheet.get_string_arrays()
+        quantity_strings = sheet.get_quantity_strings()
     
-    Log.print( 'Project root:  %s' % config.root )
-    Log.print( 'Generator:     %s' % config.generator )
-    Log.print( 'Loader:        %s' % loader )
-    Log.print( 'Languages:     %s' % ', '.join(config.languages) )
-    Log.print( 'ID key:        %s' % key_id)
-    Log.print( 'Sorted by key: %s' % config.sorted)
-    Log.print( 'Generating language resources...' )
+        Log.print( 'Project root:  %s' % config.root )
+        Log.print( 'Generator:     %s' % config.generator )
+        Log.print( 'Loader:        %s' % loader )
+        Log.print( 'Languages:     %s' % ', '.join(config.languages) )
+        Log.print( 'ID key:        %s' % key_id)
+        Log.print( 'Sorted by key: %s' % config.sorted)
+        Log.print( 'Jobs:          %s' % args.jobs)
+        Log.print( 'Incremental:   %s' % args.incremental)
+        Log.print( 'Generating language resources...' )
 
-    generator = Factory.create_generator(config.generator)
-    generator.sorted = config.sorted
-    generator.add_resources(strings)
-    generator.add_resources(string_arrays)
-    generator.add_resources(quantity_strings)
+        generator = Factory.create_generator(config.generator)
+        generator.sorted = config.sorted
+        generator.add_resources(strings)
+        generator.add_resources(string_arrays)
+        generator.add_resources(quantity_strings)
 
-    # for each language create a platform-specific generator and
-    # generate resource files
-    for language in config.languages:
-        generator.generate(language)
-        generator.write( config.resource_file_path(language) )
-        if config.verbose:
-            params = (language, config.resource_file_path(language), len(strings), len(string_arrays), len(quantity_strings) )
-            Log.print(' * Language %s, file: %s, %s strings, %s arrays, %s plurals' % params)
+        def written(language, path):
+            if config.verbose:
+                params = (language, path, len(strings), len(string_arrays), len(quantity_strings) )
+                Log.print(' * Language %s, file: %s, %s strings, %s arrays, %s plurals' % params)
 
-# Very generic error handling
-except MstException as e:
-    print("ERROR: %s" % e)
-    exit(1)
+        # for each language generate and write resource files, possibly
+        # in parallel
+        builder = Builder(config, generator, args.jobs, args.incremental)
+        built = builder.build(callback=written)
+        if len(built) < len(config.languages):
+            Log.print(' * %s languages up to date' % (len(config.languages) - len(built)) )
+
+    # Very generic error handling
+    except MstException as e:
+        print("ERROR: %s" % e)
+        exit(1)
+
+if __name__ == '__main__':
+    main()
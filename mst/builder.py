@@ -0,0 +1,130 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from mst.utils import write_file
+
+# generator used by a worker process; it is sent once per worker
+_worker_generator = None
+
+def _init_worker(generator):
+    global _worker_generator
+    _worker_generator = generator
+
+def _generate(language, path):
+    _worker_generator.generate_file(language, path)
+    return path
+
+class Builder(object):
+    """
+    Builder generates resource files for all configured languages
+    using a generator populated with resources.
+
+    Resources are streamed directly to output files, so memory usage does
+    not depend on size of generated documents. With jobs > 1, languages
+    are generated concurrently by a pool of processes, each of them
+    writing its own files. Both modes use the same generation code, so
+    output files are identical.
+
+    In incremental mode, fingerprints of generator input are kept in
+    a state file in project root. Only languages whose fingerprint
+    changed, or whose output file is missing, are generated.
+    """
+
+    def __init__(self, config, generator, jobs=1, incremental=False):
+        self.__config = config
+        self.__generator = generator
+        self.__jobs = max(1, jobs)
+        self.__incremental = incremental
+
+    @property
+    def config(self):
+        return self.__config
+
+    @property
+    def generator(self):
+        return self.__generator
+
+    @property
+    def jobs(self):
+        return self.__jobs
+
+    @property
+    def incremental(self):
+        return self.__incremental
+
+    def build(self, languages=None, callback=None):
+        """
+        Generate and write resource files. By default all configured
+        languages are built. Callback, if given, is called with
+        language code and file path after each file is written.
+        Returns list of built languages; in incremental mode up-to-date
+        languages are skipped and not returned.
+        """
+        languages = self.config.languages if languages is None else list(languages)
+        if self.incremental:
+            state = self.__load_state()
+            fingerprints = dict( (language, self.generator.fingerprint(language)) for language in languages )
+            languages = [language for language in languages if self.__outdated(language, fingerprints[language], state)]
+        if self.jobs == 1 or len(languages) < 2:
+            self.__build_serial(languages, callback)
+        else:
+            self.__build_parallel(languages, callback)
+        if self.incremental and languages:
+            for language in languages:
+                state[ self.__state_key(language) ] = fingerprints[language]
+            self.__save_state(state)
+        return languages
+
+    def __state_key(self, language):
+        return os.path.relpath( self.config.resource_file_path(language), self.config.root )
+
+    def __outdated(self, language, fingerprint, state):
+        if not os.path.isfile( self.config.resource_file_path(language) ):
+            return True
+        return state.get( self.__state_key(language) ) != fingerprint
+
+    def __load_state(self):
+        """Load fingerprints of previous build; broken state means full build"""
+        try:
+            with open(self.config.state_file_path, 'r') as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def __save_state(self, state):
+        write_file( self.config.state_file_path, json.dumps(state, indent=1, sort_keys=True) )
+
+    def __build_serial(self, languages, callback):
+        for language in languages:
+            path = self.config.resource_file_path(language)
+            self.generator.generate_file(language, path)
+            if callback:
+                callback(language, path)
+
+    def __build_parallel(self, languages, callback):
+        jobs = min(self.jobs, len(languages))
+        paths = [self.config.resource_file_path(language) for language in languages]
+        with ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(self.generator,)) as workers:
+            # progress is reported from the calling thread only
+            for language, path in zip(languages, workers.map(_generate, languages, paths)):
+                if callback:
+                    callback(language, path)
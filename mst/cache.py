@@ -0,0 +1,120 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+import hashlib
+import json
+import os
+import time
+from mst.utils import write_file
+
+class WorksheetCache(object):
+    """
+    Persistent cache of downloaded worksheet data. Each entry keeps data
+    matrix along with worksheet's 'updated' timestamp, so it can be used
+    as long as worksheet was not modified.
+
+    Entries are keyed by spreadsheet id, worksheet id and list of
+    projected columns. Entries not used for max_age seconds are evicted,
+    as well as least recently used entries above max_entries limit.
+    Cache errors are never fatal - a broken entry is a cache miss.
+    """
+
+    def __init__(self, directory=None, max_entries=32, max_age=30*24*3600):
+        if directory is None:
+            cache_home = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+            directory = os.path.join(cache_home, 'mst')
+        self.__directory = directory
+        self.__max_entries = max_entries
+        self.__max_age = max_age
+
+    def __str__(self):
+        return 'Worksheet cache: %s' % self.directory
+
+    @property
+    def directory(self):
+        return self.__directory
+
+    def __entry_path(self, spreadsheet_id, worksheet_id, columns):
+        key = json.dumps([spreadsheet_id, worksheet_id, columns])
+        name = hashlib.sha1( key.encode('utf-8') ).hexdigest()
+        return os.path.join(self.directory, name + '.json')
+
+    def get(self, spreadsheet_id, worksheet_id, updated, columns=None):
+        """
+        Return cached data matrix or None if there is no entry or the
+        worksheet was updated since the entry was stored.
+        """
+        path = self.__entry_path(spreadsheet_id, worksheet_id, columns)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+            if entry['updated'] != updated:
+                return None
+            os.utime(path) # mark as recently used
+            return entry['data']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def put(self, spreadsheet_id, worksheet_id, updated, data, columns=None):
+        """Store data matrix of a worksheet and evict stale entries"""
+        entry = {
+            'spreadsheet': spreadsheet_id,
+            'worksheet': worksheet_id,
+            'columns': columns,
+            'updated': updated,
+            'data': data
+        }
+        try:
+            write_file( self.__entry_path(spreadsheet_id, worksheet_id, columns), json.dumps(entry) )
+            self.evict()
+        except OSError:
+            pass
+
+    def entries(self):
+        """List of (path, last use time) tuples, most recently used first"""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        entries = []
+        for name in names:
+            if name.endswith('.json'):
+                path = os.path.join(self.directory, name)
+                try:
+                    entries.append( (path, os.path.getmtime(path)) )
+                except OSError:
+                    pass
+        return sorted(entries, key=lambda entry: entry[1], reverse=True)
+
+    def evict(self):
+        """Remove expired entries and entries above the size limit"""
+        deadline = time.time() - self.__max_age
+        for i, (path, used) in enumerate( self.entries() ):
+            if i >= self.__max_entries or used < deadline:
+                self.__remove(path)
+
+    def clear(self):
+        """Remove all entries"""
+        for path, used in self.entries():
+            self.__remove(path)
+
+    def __remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -77,6 +77,14 @@ class Config(object):
         """If True, strings should be sorted by key"""
         return self.__sorted
 
+    @property
+    def state_file_path(self):
+        """
+        Path of a file keeping build state between runs. It is
+        located in project root directory.
+        """
+        return os.path.join( self.root, '.mst.state' )
+
     def resource_file_path(self, language):
         """
         Returns file path for a given language. File will be
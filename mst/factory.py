@@ -8,19 +8,30 @@ class Factory(object):
 
     LOADER_GOOGLEDOCS = 'googledocs'
     LOADER_CSV = 'csv'
+    LOADER_CSV_MMAP = 'csv-mmap'
 
     @staticmethod
-    def create_loader(loader_type, loader_args):
+    def create_loader(loader_type, loader_args, streaming=False, columns=None, cache=None, band_rows=None):
+        """
+        Create a loader of a given type. If streaming is True, loaders
+        supporting it will read rows lazily through Loader.stream().
+        Columns is a list of column names required by a build; loaders
+        may use it to skip processing of other columns. Cache and
+        band_rows are used by loaders downloading data.
+        """
         if loader_type == Factory.LOADER_GOOGLEDOCS:
             user = loader_args[0]
             password = loader_args[1]
             spreadsheet = loader_args[2]
-            return loader.LoaderGoogle(user, password, spreadsheet)
+            return loader.LoaderGoogle(user, password, spreadsheet, columns=columns, cache=cache, band_rows=band_rows)
         elif loader_type == Factory.LOADER_CSV:
             file = loader_args[0]
-            return loader.LoaderCsv(file)
+            return loader.LoaderCsv(file, streaming, columns=columns)
+        elif loader_type == Factory.LOADER_CSV_MMAP:
+            file = loader_args[0]
+            return loader.LoaderCsv(file, True, loader.LoaderCsv.BACKEND_MMAP, columns)
         else:
-            msg = 'Unknown loader requested: %s. Allowed: %s' % ( str(loader_type), [Factory.LOADER_CSV, Factory.LOADER_GOOGLEDOCS])
+            msg = 'Unknown loader requested: %s. Allowed: %s' % ( str(loader_type), [Factory.LOADER_CSV, Factory.LOADER_CSV_MMAP, Factory.LOADER_GOOGLEDOCS])
             raise RuntimeError(msg)
 
     GENERATOR_ANDROID = 'android'
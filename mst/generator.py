@@ -16,11 +16,13 @@
 #     along with Mobile Strings Toolkit; if not, write to the Free Software
 #     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 
-import xml.dom.minidom as xml
-import os
+import hashlib
+import io
 import unicodedata
 
+from mst import const
 from mst.resources import (String, StringArray, QuantityStrings)
+from mst.utils import write_file, open_file
 
 class Escape(object):
     @staticmethod
@@ -35,6 +37,24 @@ class Escape(object):
         return string.replace("\\'", "\'").replace("\'", "\\'")
 
 
+def xml_escape(text):
+    """
+    Escape XML special characters in text and attribute values.
+    """
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('"', '&quot;').replace('>', '&gt;')
+
+
+class NfcWriter(object):
+    """
+    Stream wrapper normalizing written text to NFC form.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        return self.stream.write( unicodedata.normalize('NFC', text) )
+
+
 class Generator(object):
     """
     Base class for all string resources generators. All generators
@@ -43,6 +63,11 @@ class Generator(object):
     * _addString()
     * _addStringArray()
     * _addQuantityString()
+
+    Output document is kept in memory by default. If a stream is given
+    to generate(), output is written to the stream as soon as each
+    resource is rendered. Generators supporting it should write to
+    the stream in init() and _end() methods.
     """
     
     def __init__(self, sorted=False):
@@ -50,10 +75,20 @@ class Generator(object):
         self.__arrays = []
         self.__plurals = []
         self.__sorted = sorted
+        self.__stream = None
 
     def init(self):
         raise NotImplementedError('Abstract method is not implemented')
 
+    def _end(self):
+        """Called when all resources are generated"""
+        pass
+
+    @property
+    def stream(self):
+        """Stream receiving output during generation or None"""
+        return self.__stream
+
     @property
     def sorted(self):
         return self.__sorted
@@ -77,7 +112,13 @@ class Generator(object):
             else:
                 raise TypeError("Unknown resource type: %s" % str( res.__class__) )
 
-    def generate(self, language):
+    def generate(self, language, stream=None):
+        """
+        Generate resources for a given language. If stream is given,
+        output document is written to it piece by piece and is not
+        kept in memory.
+        """
+        self.__stream = stream
         self.init()
         strings = sorted(self.__strings) if self.sorted else self.__strings
         arrays = sorted(self.__arrays) if self.sorted else self.__arrays
@@ -88,9 +129,70 @@ class Generator(object):
             self._add_string_array(a, language)
         for p in plurals:
             self._add_quantity_string(p, language)
+        self._end()
+        self.__stream = None
 
-    def write(self, file):
+    def fingerprint(self, language):
+        """
+        Return a digest of all generator input for a given language:
+        tool version, generator type, ordering, resource types, keys,
+        texts and options. Output for a language changes only if its
+        fingerprint changes, so outputs of older tool versions are
+        rebuilt after an upgrade.
+        """
+        digest = hashlib.sha1()
+        def update(*fields):
+            for field in fields:
+                data = str(field).encode('utf-8')
+                digest.update( b'%d:' % len(data) )
+                digest.update( data )
+        def update_text(text):
+            update( text, ';'.join( getattr(text, 'options', []) ) )
+        update( const.version, self.__class__.__name__, self.sorted )
+        for s in self.__strings:
+            update( 'string', s.key )
+            update_text( s.get(language) )
+        for a in self.__arrays:
+            items = a.get_array(language)
+            update( 'string-array', a.key, len(items) )
+            for item in items:
+                update_text(item)
+        for p in self.__plurals:
+            update( 'plurals', p.key )
+            for quantity in QuantityStrings.QUANTITIES:
+                update_text( p.get_quantity_string(language, quantity) )
+        return digest.hexdigest()
+
+    def render(self, language):
+        """
+        Generate resources for a given language and return output
+        document as a string.
+        """
+        self.generate(language)
+        return self.output
+
+    @property
+    def output(self):
+        """Generated output document as a string"""
         raise NotImplementedError('Abstract method is not implemented')
+
+    def write(self, file):
+        """
+        Write generated output document to a file. File is not touched
+        if its contents would not change. Returns True if file was written.
+        """
+        return write_file(file, self.output)
+
+    def generate_file(self, language, file):
+        """
+        Generate resources for a given language and write them directly
+        to a file, without keeping output document in memory. File is
+        replaced atomically and only if its contents change. Returns
+        True if file was written.
+        """
+        with open_file(file) as f:
+            self.generate(language, f)
+        return f.changed
     
     def _add_string(self, resource, language):
         raise NotImplementedError('Abstract method is not implemented')
@@ -108,71 +210,80 @@ class AndroidXmlGenerator(Generator):
     This is a string resources generator for Android platform. It will generate
     resource XML strings that you can write to your res/values files.
     
-    By default it starts with empty DOM. Add resources to populate DOM and read
-    XML string once you're done.
+    XML is serialized incrementally, element by element, without building
+    a DOM. Output is formatted the same way as minidom's toprettyxml(),
+    which was used before.
     '''
     def __init__(self):
         Generator.__init__(self)
-        self.doc = None
-        self.root = None
+        self.buffer = io.StringIO()
+        self.__elements = 0
 
     def init(self):
-        self.doc = xml.Document()
-        self.root = self.doc.createElement('resources')
-        self.doc.appendChild(self.root)
+        self.buffer = io.StringIO() if self.stream is None else self.stream
+        self.__elements = 0
+        self.buffer.write('<?xml version="1.0" ?>\n')
+
+    def _end(self):
+        if self.__elements > 0:
+            self.buffer.write('</resources>\n')
+        else:
+            self.buffer.write('<resources/>\n')
+        if self.stream is not None:
+            self.buffer = io.StringIO()
+
+    def __begin_element(self):
+        """Open root element before the first resource element"""
+        if self.__elements == 0:
+            self.buffer.write('<resources>\n')
+        self.__elements += 1
+
+    def __write_element(self, name, key, items):
+        """
+        Write resource element with its items. Items is a list of already
+        serialized child elements. Element without items is written as
+        an empty tag.
+        """
+        self.__begin_element()
+        if items:
+            self.buffer.write('\t<%s name="%s">\n%s\t</%s>\n' % (name, xml_escape(key), ''.join(items), name))
+        else:
+            self.buffer.write('\t<%s name="%s"/>\n' % (name, xml_escape(key)))
     
     def _add_string(self, resource, language):
-        string = self.doc.createElement('string')
-        string.setAttribute('name', resource.key)
         text = Escape.escape(resource.get(language))
         if len(text) > 0:
-            text_node = self.doc.createTextNode( text )
-            string.appendChild(text_node)
-            self.root.appendChild(string)
+            self.__begin_element()
+            self.buffer.write('\t<string name="%s">%s</string>\n' % (xml_escape(resource.key), xml_escape(text)))
         
     def _add_string_array(self, resource, language):
-        array = self.doc.createElement('string-array')
-        array.setAttribute('name', resource.key)
+        items = []
         for item_text in resource.get_array(language):
             if len(item_text) > 0:
                 text = Escape.escape( item_text )
-                text_node = self.doc.createTextNode( text )
-                item_element = self.doc.createElement('item')
-                item_element.appendChild(text_node)
-                array.appendChild(item_element)
-        self.root.appendChild(array)
+                items.append('\t\t<item>%s</item>\n' % xml_escape(text))
+        self.__write_element('string-array', resource.key, items)
 
     def _add_quantity_string(self, resource, language):
-        plurals = self.doc.createElement('plurals')
-        plurals.setAttribute('name', resource.key)
+        items = []
         # check for each quantity defined in schema and
         # add add it to XML only of string is not empty
         for quantity in QuantityStrings.QUANTITIES:
             quantity_string = Escape.escape( resource.get_quantity_string(language, quantity) )
             if len(quantity_string) > 0:
-                text_node = self.doc.createTextNode(quantity_string)
-                item_element = self.doc.createElement('item')
-                item_element.setAttribute('quantity', quantity)
-                item_element.appendChild(text_node)
-                plurals.appendChild(item_element)
-        self.root.appendChild(plurals)
+                items.append('\t\t<item quantity="%s">%s</item>\n' % (xml_escape(quantity), xml_escape(quantity_string)))
+        self.__write_element('plurals', resource.key, items)
 
     @property
     def xml(self):
         '''
-        Create XML string from current DOM.
+        Generated XML string.
         '''
-        return self.doc.toprettyxml()
+        return self.buffer.getvalue()
 
-    def write(self, file):
-        # first ensure directory is created
-        directory = os.path.dirname(file)
-        if not os.path.exists(directory):
-            os.makedirs(directory)
-        # open and write file contents
-        f = open(file, 'w')
-        f.write( self.xml )
-        f.close()
+    @property
+    def output(self):
+        return self.xml
 
 
 class AndroidGenerator(Generator):
@@ -180,80 +291,96 @@ class AndroidGenerator(Generator):
     This is a string resources generator for Android platform. It will generate
     resource XML strings that you can write to your res/values files.
 
-    By default it starts with empty DOM. Add resources to populate DOM and read
-    XML string once you're done.
+    Resources are rendered to a text buffer, so generation time grows
+    linearly with number of resources. When generating to a stream, the
+    stream is used as the buffer.
     '''
     def __init__(self):
         Generator.__init__(self)
         self.xml_head = '<?xml version="1.0" encoding="utf-8"?>\n<resources">\n\n'
         self.xml_tail = '\n\n</resources>'
-        self.xml_body = ''
+        self.buffer = io.StringIO()
 
     def init(self):
-        self.xml_body = ''
+        if self.stream is None:
+            self.buffer = io.StringIO()
+        else:
+            self.buffer = NfcWriter(self.stream)
+            self.buffer.write(self.xml_head)
+
+    def _end(self):
+        if self.stream is not None:
+            self.buffer.write(self.xml_tail)
+            self.buffer = io.StringIO()
+
+    @property
+    def xml_body(self):
+        return self.buffer.getvalue()
 
     def _add_string(self, resource, language):
         text = Escape.escape(resource.get(language))
         if len(text) > 0:
             string_item = '<string name="%s">%s</string>\n' % (resource.key, text)
-            self.xml_body += string_item
+            self.buffer.write(string_item)
 
     def _add_string_array(self, resource, language):
         xml_head = '<string-array name="%s">\n' % resource.key
         xml_tail = '</string-array>\n'
-        xml_items = ''
+        xml_items = []
 
         for item_text in resource.get_array(language):
             if len(item_text) > 0:
-                xml_items += '\t<item>%s</item>\n' % Escape.escape(item_text)
+                xml_items.append( '\t<item>%s</item>\n' % Escape.escape(item_text) )
 
         if len(xml_items) > 0:
-            self.xml_body += xml_head + xml_items + xml_tail
+            self.buffer.write( xml_head + ''.join(xml_items) + xml_tail )
 
     def _add_quantity_string(self, resource, language):
         xml_head = '<plurals name="%s">\n' % resource.key
         xml_tail = '</plurals>\n'
-        xml_items = ''
+        xml_items = []
         xml_item_fmt = '\t<item quantity="%s">%s</item>\n'
         # check for each quantity defined in schema and
         # add add it to XML only of string is not empty
         for quantity in QuantityStrings.QUANTITIES:
             quantity_text = Escape.escape( resource.get_quantity_string(language, quantity) )
             if len(quantity_text) > 0:
-                xml_items += xml_item_fmt % (quantity, Escape.escape(quantity_text) )
+                xml_items.append( xml_item_fmt % (quantity, Escape.escape(quantity_text) ) )
 
         if len(xml_items) > 0:
-            self.xml_body += xml_head + xml_items + xml_tail
+            self.buffer.write( xml_head + ''.join(xml_items) + xml_tail )
 
     @property
     def xml(self):
         all = self.xml_head + self.xml_body + self.xml_tail
         return unicodedata.normalize('NFC', all)
 
-    def write(self, file):
-        # first ensure directory is created
-        directory = os.path.dirname(file)
-        if not os.path.exists(directory):
-            os.makedirs(directory)
-        # open and write file contents
-        f = open(file, 'w')
-        f.write( self.xml )
-        f.close()
+    @property
+    def output(self):
+        return self.xml
 
         
 class AppleGenerator(Generator):
 
     def __init__(self):
         Generator.__init__(self)
-        self.doc = ''
+        self.buffer = io.StringIO()
 
     def init(self):
-        self.doc = ''
+        self.buffer = io.StringIO() if self.stream is None else self.stream
+
+    def _end(self):
+        if self.stream is not None:
+            self.buffer = io.StringIO()
+
+    @property
+    def doc(self):
+        return self.buffer.getvalue()
 
     def _add_string(self, resource, language):
         text = resource.get(language)
         if len(text) > 0:
-            self.doc += '"%s" = "%s";\n' % (resource.key, resource.get(language))
+            self.buffer.write( '"%s" = "%s";\n' % (resource.key, resource.get(language)) )
 
     def _add_string_array(self, resource, language):
         pass
@@ -261,12 +388,6 @@ class AppleGenerator(Generator):
     def _add_quantity_string(self, resource, language):
         pass
 
-    def write(self, file):
-        # first ensure directory is created
-        directory = os.path.dirname(file)
-        if not os.path.exists(directory):
-            os.makedirs(directory)
-        # open and write file contents
-        f = open(file, 'w')
-        f.write( self.doc )
-        f.close()
+    @property
+    def output(self):
+        return self.doc
@@ -12,7 +12,7 @@ __version__ = '0.0.15'
 __author__ = 'Anton Burnashev'
 
 from .client import Client, login
-from .models import Spreadsheet, Worksheet, Cell
+from .models import Spreadsheet, Worksheet, WorksheetSnapshot, Cell
 from .exceptions import (GSpreadException, AuthenticationError,
                          SpreadsheetNotFound, NoValidUrlKeyFound,
                          IncorrectCellLabel, WorksheetNotFound,
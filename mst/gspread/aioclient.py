@@ -0,0 +1,624 @@
+# -*- coding: utf-8 -*-
+
+"""
+gspread.aioclient
+~~~~~~~~~~~~~~~~~
+
+This module contains AsyncClient class, an asyncio counterpart of
+:class:`~gspread.Client`. It talks HTTP/1.1 directly over
+:func:`asyncio.open_connection`, so feeds of several spreadsheets can
+be downloaded at the same time from a single thread.
+
+Only reading is supported: spreadsheets and worksheets opened by
+:class:`AsyncClient` offer worksheet lookups and cell values, as
+coroutines.
+
+It requires Python 3.6 or newer and is therefore not imported by the
+package itself.
+
+"""
+
+import asyncio
+import email.parser
+import io
+import zlib
+from http.client import HTTPMessage
+from urllib.error import HTTPError
+from urllib.parse import urlencode, urlsplit, urljoin
+from xml.etree import ElementTree
+
+from . import __version__
+from .client import AUTH_SERVER, _SpreadsheetIndex
+from .ns import _ns, _ns1
+from .models import Spreadsheet, Worksheet
+from .pool import REDIRECT_CODES, MAX_REDIRECTS, _SAFE_METHODS
+from .urls import construct_url
+from .utils import dense_matrix
+from .exceptions import AuthenticationError, SpreadsheetNotFound, WorksheetNotFound
+
+
+class AsyncResponse(object):
+    """Fully read response of :class:`AsyncHTTPSession`.
+
+       :param url: Requested URL.
+       :param code: HTTP status code.
+       :param headers: Response headers.
+       :param body: Response body, already decompressed.
+       :param reason: Reason phrase of the status line.
+    """
+    def __init__(self, url, code, headers, body, reason=''):
+        self.url = url
+        self.code = code
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    def read(self):
+        return self.body
+
+    def info(self):
+        return self.headers
+
+    def getcode(self):
+        return self.code
+
+
+class _Exchange(object):
+    """Response of :class:`AsyncHTTPSession` whose body is not read yet."""
+    def __init__(self, key, connection, url, method, code, reason, headers, keep_alive):
+        self.key = key
+        self.connection = connection
+        self.url = url
+        self.method = method
+        self.code = code
+        self.reason = reason
+        self.headers = headers
+        self.keep_alive = keep_alive
+
+
+class _Decoder(object):
+    """Undoes ``gzip`` or ``deflate`` content encoding of a body passed
+    in chunks. Bodies in other encodings are passed through.
+
+    """
+    def __init__(self, encoding):
+        self._raw_deflate = None if encoding == 'deflate' else False
+        if encoding in ('gzip', 'x-gzip'):
+            self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            self._decompressor = zlib.decompressobj()
+        else:
+            self._decompressor = None
+
+    def decompress(self, chunk):
+        if self._decompressor is None:
+            return chunk
+        if self._raw_deflate is None:
+            # Some servers send raw deflate streams without zlib header
+            try:
+                data = self._decompressor.decompress(chunk)
+                self._raw_deflate = False
+                return data
+            except zlib.error:
+                self._raw_deflate = True
+                self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._decompressor.decompress(chunk)
+
+    def flush(self):
+        if self._decompressor is None:
+            return b''
+        return self._decompressor.flush()
+
+
+class _CellsParser(object):
+    """Incremental parser of a cells feed fed with chunks of bytes.
+
+    Like :func:`~gspread.utils.iter_cells` it clears every entry once
+    its cell is read, so memory use does not grow with the feed.
+
+    """
+    def __init__(self):
+        self._parser = ElementTree.XMLPullParser(events=('start', 'end'))
+        self._root = None
+
+    def feed(self, data):
+        """Parses a chunk and returns `(row, col, value)` tuples of the
+        entries it completes."""
+        self._parser.feed(data)
+        return self._cells()
+
+    def close(self):
+        """Finishes parsing and returns the remaining cells."""
+        self._parser.close()
+        return self._cells()
+
+    def _cells(self):
+        entry_tag = _ns('entry')
+        cell_tag = _ns1('cell')
+        cells = []
+        for event, elem in self._parser.read_events():
+            if event == 'start':
+                if self._root is None:
+                    self._root = elem
+            elif elem.tag == entry_tag:
+                cell = elem.find(cell_tag)
+                if cell is not None:
+                    cells.append((int(cell.get('row')), int(cell.get('col')), cell.text))
+                self._root.clear()
+        return cells
+
+
+class AsyncHTTPSession(object):
+    """Handles asynchronous HTTP activity while keeping headers persisting
+    across requests.
+
+    Connections are kept alive and reused, up to ``max_idle`` idle
+    connections per host. Redirects are followed and responses other
+    than 2xx raise :class:`urllib.error.HTTPError`.
+
+       :param headers: A dict with initial headers.
+       :param compress: Whether to ask for gzip or deflate compressed responses.
+       :param max_idle: Maximum number of idle connections per host.
+    """
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, headers=None, compress=True, max_idle=4):
+        self.headers = headers or {}
+        self.compress = compress
+        self.max_idle = max_idle
+        self._idle = {}
+
+    def add_header(self, name, value):
+        self.headers[name] = value
+
+    async def close(self):
+        """Closes all idle connections."""
+        idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for reader, writer in connections:
+                writer.close()
+
+    async def get(self, url, **kwargs):
+        return await self.request('get', url, **kwargs)
+
+    async def post(self, url, data=None, **kwargs):
+        return await self.request('post', url, data=data, **kwargs)
+
+    async def request(self, method, url, data=None, headers=None):
+        """Sends a request and returns :class:`AsyncResponse` with the
+        whole body read."""
+        exchange = await self._follow(method, url, data, headers)
+        body = b''.join([chunk async for chunk in self._iter_decoded(exchange)])
+        return AsyncResponse(exchange.url, exchange.code, exchange.headers, body, exchange.reason)
+
+    async def stream(self, url, headers=None):
+        """Sends a GET request and yields chunks of the decompressed
+        response body as they arrive."""
+        exchange = await self._follow('get', url, None, headers)
+        async for chunk in self._iter_decoded(exchange):
+            yield chunk
+
+    def _prepare(self, data, headers):
+        if data and not isinstance(data, (str, bytes)):
+            data = urlencode(data)
+        if isinstance(data, str):
+            data = data.encode()
+
+        request_headers = self.headers.copy()
+        if data is not None:
+            request_headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if self.compress:
+            request_headers['Accept-Encoding'] = 'gzip, deflate'
+        if headers:
+            for k, v in headers.items():
+                if v is None:
+                    request_headers.pop(k, None)
+                else:
+                    request_headers[k] = v
+        return data, request_headers
+
+    async def _follow(self, method, url, data, headers):
+        """Sends a request, following redirects. Returns the exchange of
+        a 2xx response with its body not read yet."""
+        data, request_headers = self._prepare(data, headers)
+
+        method = method.upper()
+        for i in range(MAX_REDIRECTS + 1):
+            exchange = await self._send(method, url, data, request_headers)
+            if 200 <= exchange.code < 300:
+                return exchange
+            body = b''.join([chunk async for chunk in self._iter_decoded(exchange)])
+            location = exchange.headers.get('Location')
+            if exchange.code not in REDIRECT_CODES or not location:
+                break
+            url = urljoin(url, location)
+            if exchange.code == 303 or (exchange.code in (301, 302) and method == 'POST'):
+                method, data = 'GET', None
+                request_headers.pop('Content-Type', None)
+
+        raise HTTPError(url, exchange.code, exchange.reason, exchange.headers, io.BytesIO(body))
+
+    async def _send(self, method, url, data, headers):
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname,
+               parts.port or (443 if parts.scheme == 'https' else 80))
+        path = parts.path or '/'
+        if parts.query:
+            path = '%s?%s' % (path, parts.query)
+
+        lines = ['%s %s HTTP/1.1' % (method, path), 'Host: %s' % parts.netloc]
+        lines.extend('%s: %s' % item for item in headers.items())
+        if data is not None:
+            lines.append('Content-Length: %d' % len(data))
+        request = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + (data or b'')
+
+        connection = self._acquire(key)
+        if connection is not None:
+            try:
+                await self._write(connection, request)
+            except ConnectionError:
+                # nothing reached the server, send it on a new connection
+                pass
+            else:
+                try:
+                    return await self._read_head(key, connection, url, method)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    # the server may have received the request, so only
+                    # safe methods are sent again
+                    if method not in _SAFE_METHODS:
+                        raise
+
+        connection = await asyncio.open_connection(key[1], key[2],
+                                                   ssl=key[0] == 'https')
+        await self._write(connection, request)
+        return await self._read_head(key, connection, url, method)
+
+    def _acquire(self, key):
+        idle = self._idle.get(key, [])
+        while idle:
+            reader, writer = idle.pop()
+            if not reader.at_eof():
+                return reader, writer
+            writer.close()
+        return None
+
+    def _release(self, key, connection):
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < self.max_idle:
+            idle.append(connection)
+        else:
+            connection[1].close()
+
+    async def _write(self, connection, request):
+        """Sends a request, closing the connection if that fails."""
+        writer = connection[1]
+        try:
+            writer.write(request)
+            await writer.drain()
+        except BaseException:
+            writer.close()
+            raise
+
+    async def _read_head(self, key, connection, url, method):
+        """Reads the status line and headers of a response."""
+        reader, writer = connection
+        try:
+            status = await reader.readline()
+            if not status:
+                raise asyncio.IncompleteReadError(status, None)
+            version, code, reason = (status.decode('latin-1').split(None, 2) + [''])[:3]
+
+            head = []
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                head.append(line.decode('latin-1'))
+            headers = email.parser.Parser(_class=HTTPMessage).parsestr(''.join(head))
+        except BaseException:
+            writer.close()
+            raise
+
+        keep_alive = version == 'HTTP/1.1' and \
+            (headers.get('Connection') or '').lower() != 'close'
+        return _Exchange(key, connection, url, method, int(code), reason.strip(),
+                         headers, keep_alive)
+
+    async def _iter_decoded(self, exchange):
+        """Yields decompressed chunks of a response body.
+
+        The connection goes back to the pool once the body is read to
+        the end and it is closed if reading stops before that.
+
+        """
+        encoding = (exchange.headers.get('Content-Encoding') or '').strip().lower()
+        decoder = _Decoder(encoding)
+        done = False
+        try:
+            async for chunk in self._iter_body(exchange):
+                data = decoder.decompress(chunk)
+                if data:
+                    yield data
+            done = True
+        finally:
+            if done and exchange.keep_alive:
+                self._release(exchange.key, exchange.connection)
+            else:
+                exchange.connection[1].close()
+
+        data = decoder.flush()
+        if data:
+            yield data
+
+    async def _iter_body(self, exchange):
+        reader = exchange.connection[0]
+        headers = exchange.headers
+        code = exchange.code
+        if exchange.method == 'HEAD' or code in (204, 304) or 100 <= code < 200:
+            return
+
+        if (headers.get('Transfer-Encoding') or '').lower() == 'chunked':
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if not size:
+                    break
+                yield await reader.readexactly(size)
+                await reader.readline()
+            # trailer headers
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+        elif headers.get('Content-Length') is not None:
+            remaining = int(headers['Content-Length'])
+            while remaining:
+                chunk = await reader.readexactly(min(remaining, self.CHUNK_SIZE))
+                remaining -= len(chunk)
+                yield chunk
+        else:
+            exchange.keep_alive = False
+            while True:
+                chunk = await reader.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+
+class AsyncSpreadsheet(object):
+    """A spreadsheet opened by :class:`AsyncClient`.
+
+    It wraps :class:`~gspread.Spreadsheet` and offers worksheet lookups
+    only, as coroutines.
+
+    """
+    def __init__(self, client, feed_entry):
+        self.client = client
+        self._spreadsheet = Spreadsheet(client, feed_entry)
+        self._sheet_list = []
+        self._sheet_index = None
+
+    def __repr__(self):
+        return '<%s id:%s>' % (self.__class__.__name__, self.id)
+
+    @property
+    def id(self):
+        """Id of a spreadsheet."""
+        return self._spreadsheet.id
+
+    def get_id_fields(self):
+        return self._spreadsheet.get_id_fields()
+
+    async def _sheets(self):
+        if not self._sheet_list:
+            feed = await self.client.get_worksheets_feed(self)
+            for elem in feed.findall(_ns('entry')):
+                self._sheet_list.append(AsyncWorksheet(self, elem))
+        return self._sheet_list
+
+    def _find_worksheet(self, title):
+        if self._sheet_index is None:
+            self._sheet_index = {}
+            for sheet in self._sheet_list:
+                self._sheet_index.setdefault(sheet.title, sheet)
+
+        try:
+            return self._sheet_index[title]
+        except KeyError:
+            raise WorksheetNotFound(title)
+
+    async def worksheets(self):
+        """Returns a list of all :class:`worksheets <AsyncWorksheet>` in a spreadsheet."""
+        return (await self._sheets())[:]
+
+    async def worksheet(self, title):
+        """Returns a worksheet with specified `title`.
+
+        :param title: A title of a worksheet.
+
+        :raises gspread.WorksheetNotFound: if there is no such worksheet.
+
+        """
+        await self._sheets()
+        return self._find_worksheet(title)
+
+    async def get_worksheet(self, index):
+        """Returns a worksheet with specified `index` or `None` if the
+        worksheet is not found.
+
+        :param index: An index of a worksheet. Indexes start from zero.
+
+        """
+        sheets = await self._sheets()
+        try:
+            return sheets[index]
+        except IndexError:
+            return None
+
+
+class AsyncWorksheet(object):
+    """A worksheet of :class:`AsyncSpreadsheet`.
+
+    It wraps :class:`~gspread.Worksheet` and offers reading of cell
+    values only, as coroutines.
+
+    """
+    def __init__(self, spreadsheet, element):
+        self.spreadsheet = spreadsheet
+        self.client = spreadsheet.client
+        self._worksheet = Worksheet(spreadsheet._spreadsheet, element)
+
+    def __repr__(self):
+        return '<%s "%s" id:%s>' % (self.__class__.__name__,
+                                     self.title,
+                                     self.id)
+
+    @property
+    def id(self):
+        """Id of a worksheet."""
+        return self._worksheet.id
+
+    @property
+    def title(self):
+        """Title of a worksheet."""
+        return self._worksheet.title
+
+    @property
+    def row_count(self):
+        """Number of rows"""
+        return self._worksheet.row_count
+
+    @property
+    def col_count(self):
+        """Number of columns"""
+        return self._worksheet.col_count
+
+    @property
+    def updated(self):
+        """Updated time in RFC 3339 format"""
+        return self._worksheet.updated
+
+    def get_id_fields(self):
+        return self._worksheet.get_id_fields()
+
+    async def get_all_values(self):
+        """Returns a list of lists containing all cells' values as strings."""
+        cells = await self.client.get_cells_values(self)
+        return dense_matrix(cells)
+
+
+class AsyncClient(object):
+    """An instance of this class communicates with Google Data API
+    using asyncio.
+
+    :param auth: A tuple containing an *email* and a *password* used for ClientLogin
+                 authentication.
+    :param http_session: (optional) A session object capable of making HTTP requests while persisting headers.
+                                    Defaults to :class:`~gspread.aioclient.AsyncHTTPSession`.
+
+    >>> c = AsyncClient(auth=('user@example.com', 'qwertypassword'))
+    >>> await c.login()
+    >>> a, b = await asyncio.gather(c.open('Strings'), c.open('Other strings'))
+
+    """
+    def __init__(self, auth, http_session=None):
+        self.auth = auth
+        self.session = http_session or AsyncHTTPSession()
+
+    async def login(self):
+        """Authorize client using ClientLogin protocol.
+
+        :raises AuthenticationError: if login attempt fails.
+
+        """
+        data = {'Email': self.auth[0],
+                'Passwd': self.auth[1],
+                'accountType': 'HOSTED_OR_GOOGLE',
+                'service': 'wise',
+                'source': 'burnash-gspread-%s' % __version__}
+
+        try:
+            r = await self.session.post(AUTH_SERVER + '/accounts/ClientLogin', data)
+        except HTTPError as ex:
+            if ex.code == 403 and ex.read().decode().strip() == 'Error=BadAuthentication':
+                raise AuthenticationError("Incorrect username or password")
+            raise AuthenticationError("Unable to authenticate. %s code" % ex.code)
+
+        for line in r.read().decode().splitlines():
+            if line.startswith('Auth='):
+                self.session.add_header('Authorization', 'GoogleLogin auth=%s' % line[5:])
+
+    async def close(self):
+        await self.session.close()
+
+    async def open(self, title):
+        """Opens a spreadsheet, returning a :class:`AsyncSpreadsheet` instance.
+
+        :param title: A title of a spreadsheet.
+
+        :raises gspread.SpreadsheetNotFound: if no spreadsheet with
+                                             specified `title` is found.
+
+        """
+        return AsyncSpreadsheet(self, (await self._find_spreadsheet('by_title', title))[0])
+
+    async def open_by_key(self, key):
+        """Opens a spreadsheet specified by `key`, returning a :class:`AsyncSpreadsheet` instance.
+
+        :param key: A key of a spreadsheet as it appears in a URL in a browser.
+
+        :raises gspread.SpreadsheetNotFound: if no spreadsheet with
+                                             specified `key` is found.
+
+        """
+        return AsyncSpreadsheet(self, await self._find_spreadsheet('by_key', key))
+
+    async def _find_spreadsheet(self, lookup, value):
+        index = _SpreadsheetIndex(await self.get_spreadsheets_feed())
+        found = getattr(index, lookup).get(value)
+        if found is None:
+            raise SpreadsheetNotFound
+        return found
+
+    async def get_feed(self, url):
+        r = await self.session.get(url)
+        return ElementTree.fromstring(r.read())
+
+    async def get_spreadsheets_feed(self, visibility='private', projection='full'):
+        url = construct_url('spreadsheets',
+                            visibility=visibility, projection=projection)
+        return await self.get_feed(url)
+
+    async def get_worksheets_feed(self, spreadsheet,
+                                  visibility='private', projection='full'):
+        url = construct_url('worksheets', spreadsheet,
+                            visibility=visibility, projection=projection)
+        return await self.get_feed(url)
+
+    async def get_cells_values(self, worksheet,
+                               visibility='private', projection='full', params=None):
+        """Returns a list of `(row, col, value)` tuples of a cells feed.
+
+        The feed is parsed while it is downloaded, so the response body
+        is never held in memory as a whole.
+
+        """
+        url = construct_url('cells', worksheet,
+                            visibility=visibility, projection=projection)
+        if params:
+            url = '%s?%s' % (url, urlencode(params))
+
+        parser = _CellsParser()
+        cells = []
+        async for chunk in self.session.stream(url):
+            cells.extend(parser.feed(chunk))
+        cells.extend(parser.close())
+        return cells
+
+
+async def login(email, password):
+    """Login to Google API using `email` and `password`.
+
+    :returns: :class:`AsyncClient` instance.
+
+    """
+    client = AsyncClient(auth=(email, password))
+    await client.login()
+    return client
@@ -9,6 +9,7 @@ Google Data API.
 
 """
 import re
+import time
 
 try:
     from urllib import urlencode
@@ -22,7 +23,7 @@ from .ns import _ns
 from .httpsession import HTTPSession, HTTPError
 from .models import Spreadsheet
 from .urls import construct_url
-from .utils import finditem
+from .utils import finditem, iter_cells
 from .exceptions import (AuthenticationError, SpreadsheetNotFound,
                          NoValidUrlKeyFound, UpdateCellError,
                          RequestError)
@@ -34,6 +35,25 @@ SPREADSHEETS_SERVER = 'spreadsheets.google.com'
 _url_key_re = re.compile(r'key=([^&#]+)')
 
 
+class _SpreadsheetIndex(object):
+    """Entries of a spreadsheets feed indexed by title and by key."""
+    def __init__(self, feed):
+        self.entries = feed.findall(_ns('entry'))
+        self.by_title = {}
+        self.by_key = {}
+        self.created = time.time()
+
+        for elem in self.entries:
+            title = elem.find(_ns('title')).text.strip()
+            self.by_title.setdefault(title, []).append(elem)
+
+            alter_link = finditem(lambda x: x.get('rel') == 'alternate',
+                                  elem.findall(_ns('link')))
+            m = _url_key_re.search(alter_link.get('href'))
+            if m:
+                self.by_key.setdefault(m.group(1), elem)
+
+
 class Client(object):
     """An instance of this class communicates with Google Data API.
 
@@ -41,16 +61,44 @@ class Client(object):
                  authentication.
     :param http_session: (optional) A session object capable of making HTTP requests while persisting headers.
                                     Defaults to :class:`~gspread.httpsession.HTTPSession`.
+    :param index_ttl: (optional) Number of seconds the index of spreadsheets
+                      built from the spreadsheets feed is reused by
+                      :meth:`open`, :meth:`open_by_key` and :meth:`openall`.
 
     >>> c = gspread.Client(auth=('user@example.com', 'qwertypassword'))
     >>>
 
     """
-    def __init__(self, auth, http_session=None):
+    def __init__(self, auth, http_session=None, index_ttl=60):
         self.auth = auth
 
-        if not http_session:
-            self.session = HTTPSession()
+        self.session = http_session or HTTPSession()
+        self.index_ttl = index_ttl
+        self._index = None
+
+    def _spreadsheet_index(self, refresh=False):
+        index = self._index
+        if refresh or index is None or time.time() - index.created > self.index_ttl:
+            index = self._index = _SpreadsheetIndex(self.get_spreadsheets_feed())
+        return index
+
+    def _find_spreadsheet(self, lookup, value):
+        cached = self._index
+        index = self._spreadsheet_index()
+        found = getattr(index, lookup).get(value)
+        if found is None and index is cached:
+            # the spreadsheet may have been created after the index was built
+            found = getattr(self._spreadsheet_index(refresh=True), lookup).get(value)
+        if found is None:
+            raise SpreadsheetNotFound
+        return found
+
+    def invalidate_index(self):
+        """Forgets the index of spreadsheets; the next lookup downloads
+        the spreadsheets feed again.
+
+        """
+        self._index = None
 
     def _get_auth_token(self, content):
         for line in content.splitlines():
@@ -58,6 +106,10 @@ class Client(object):
                 return line[5:]
         return None
 
+    def _parse(self, response):
+        # Parsing straight from the response decompresses it chunk by chunk
+        return ElementTree.parse(response).getroot()
+
     def _add_xml_header(self, data):
         return "<?xml version='1.0' encoding='UTF-8'?>%s" % data.decode()
 
@@ -118,14 +170,7 @@ class Client(object):
         >>> c.open('My fancy spreadsheet')
 
         """
-        feed = self.get_spreadsheets_feed()
-
-        for elem in feed.findall(_ns('entry')):
-            elem_title = elem.find(_ns('title')).text
-            if elem_title.strip() == title:
-                return Spreadsheet(self, elem)
-        else:
-            raise SpreadsheetNotFound
+        return Spreadsheet(self, self._find_spreadsheet('by_title', title)[0])
 
     def open_by_key(self, key):
         """Opens a spreadsheet specified by `key`, returning a :class:`~gspread.Spreadsheet` instance.
@@ -140,15 +185,7 @@ class Client(object):
         >>> c.open_by_key('0BmgG6nO_6dprdS1MN3d3MkdPa142WFRrdnRRUWl1UFE')
 
         """
-        feed = self.get_spreadsheets_feed()
-        for elem in feed.findall(_ns('entry')):
-            alter_link = finditem(lambda x: x.get('rel') == 'alternate',
-                                  elem.findall(_ns('link')))
-            m = _url_key_re.search(alter_link.get('href'))
-            if m and m.group(1) == key:
-                return Spreadsheet(self, elem)
-        else:
-            raise SpreadsheetNotFound
+        return Spreadsheet(self, self._find_spreadsheet('by_key', key))
 
     def open_by_url(self, url):
         """Opens a spreadsheet specified by `url`,
@@ -178,23 +215,19 @@ class Client(object):
                       spreadsheets by title.
 
         """
-        feed = self.get_spreadsheets_feed()
-        result = []
-        for elem in feed.findall(_ns('entry')):
-            if title is not None:
-                elem_title = elem.find(_ns('title')).text
-                if elem_title.strip() != title:
-                    continue
-            result.append(Spreadsheet(self, elem))
+        index = self._spreadsheet_index()
+        entries = index.entries
+        if title is not None:
+            entries = index.by_title.get(title, [])
 
-        return result
+        return [Spreadsheet(self, elem) for elem in entries]
 
     def get_spreadsheets_feed(self, visibility='private', projection='full'):
         url = construct_url('spreadsheets',
                             visibility=visibility, projection=projection)
 
         r = self.session.get(url)
-        return ElementTree.fromstring(r.read())
+        return self._parse(r)
 
     def get_worksheets_feed(self, spreadsheet,
                             visibility='private', projection='full'):
@@ -202,11 +235,9 @@ class Client(object):
                             visibility=visibility, projection=projection)
 
         r = self.session.get(url)
-        return ElementTree.fromstring(r.read())
-
-    def get_cells_feed(self, worksheet,
-                       visibility='private', projection='full', params=None):
+        return self._parse(r)
 
+    def _cells_url(self, worksheet, visibility, projection, params):
         url = construct_url('cells', worksheet,
                             visibility=visibility, projection=projection)
 
@@ -214,12 +245,34 @@ class Client(object):
             params = urlencode(params)
             url = '%s?%s' % (url, params)
 
+        return url
+
+    def get_cells_feed(self, worksheet,
+                       visibility='private', projection='full', params=None):
+
+        url = self._cells_url(worksheet, visibility, projection, params)
+        r = self.session.get(url)
+        return self._parse(r)
+
+    def iter_cells_feed(self, worksheet,
+                        visibility='private', projection='full', params=None):
+        """Yields `(row, col, value)` tuples of a cells feed.
+
+        The feed is parsed while it is downloaded, without building
+        the whole XML tree.
+
+        """
+        url = self._cells_url(worksheet, visibility, projection, params)
         r = self.session.get(url)
-        return ElementTree.fromstring(r.read())
+        try:
+            for cell in iter_cells(r):
+                yield cell
+        finally:
+            r.close()
 
     def get_feed(self, url):
         r = self.session.get(url)
-        return ElementTree.fromstring(r.read())
+        return self._parse(r)
 
     def del_worksheet(self,worksheet):
         fi = worksheet.get_id_fields()
@@ -232,7 +285,7 @@ class Client(object):
                             visibility=visibility, projection=projection)
 
         r = self.session.get(url)
-        return ElementTree.fromstring(r.read())
+        return self._parse(r)
 
     def put_feed(self, url, data):
         headers = {'Content-Type': 'application/atom+xml'}
@@ -247,7 +300,7 @@ class Client(object):
             else:
                 raise ex
 
-        return ElementTree.fromstring(r.read())
+        return self._parse(r)
 
     def post_feed(self, url, data):
         headers = {'Content-Type': 'application/atom+xml'}
@@ -259,7 +312,7 @@ class Client(object):
             message = ex.read().decode()
             raise RequestError(message)
 
-        return ElementTree.fromstring(r.read())
+        return self._parse(r)
 
     def post_cells(self, worksheet, data):
         headers = {'Content-Type': 'application/atom+xml'}
@@ -267,7 +320,7 @@ class Client(object):
         url = construct_url('cells_batch', worksheet)
         r = self.session.post(url, data, headers=headers)
 
-        return ElementTree.fromstring(r.read())
+        return self._parse(r)
 
 
 def login(email, password):
@@ -8,29 +8,215 @@ This module contains a class for working with http sessions.
 
 """
 
+import io
+import threading
+import zlib
+from collections import OrderedDict
 
 try:
-    import urllib2 as request
     from urllib import urlencode
     from urllib2 import HTTPError
 except ImportError:
-    from urllib import request
     from urllib.parse import urlencode
     from urllib.error import HTTPError
 
+from .pool import ConnectionPool
+
 try:
     unicode
 except NameError:
     basestring = unicode = str
 
 
+class CachedResponse(object):
+    """Response object holding a fully read body.
+
+    It is returned for GET requests whose body has been remembered
+    together with its validators, including requests answered with
+    ``304 Not Modified``.
+
+       :param url: Requested URL.
+       :param code: HTTP status code of the response.
+       :param headers: Response headers.
+       :param body: Response body as bytes.
+    """
+    def __init__(self, url, code, headers, body):
+        self.url = url
+        self.code = code
+        self.headers = headers
+        self.body = body
+        self._fp = io.BytesIO(body)
+
+    def read(self, amt=None):
+        return self._fp.read() if amt is None else self._fp.read(amt)
+
+    def info(self):
+        return self.headers
+
+    def getcode(self):
+        return self.code
+
+    def geturl(self):
+        return self.url
+
+    def close(self):
+        self._fp.close()
+
+
+class DecodedResponse(object):
+    """Response whose ``gzip`` or ``deflate`` content encoding is undone
+    while it is read.
+
+    The body is decompressed in chunks, so a large feed is never held
+    in memory in both forms at once.
+
+       :param response: Response object with compressed body.
+       :param encoding: Value of its ``Content-Encoding`` header.
+    """
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, response, encoding):
+        self._response = response
+        self._raw_deflate = None if encoding == 'deflate' else False
+        wbits = 16 + zlib.MAX_WBITS if encoding in ('gzip', 'x-gzip') else zlib.MAX_WBITS
+        self._decompressor = zlib.decompressobj(wbits)
+        self._buffer = b''
+        self._eof = False
+        self.url = response.geturl()
+        self.code = response.getcode()
+        self.headers = response.info()
+
+    def _decompress(self, chunk):
+        if self._raw_deflate is None:
+            # Some servers send raw deflate streams without zlib header
+            try:
+                data = self._decompressor.decompress(chunk)
+                self._raw_deflate = False
+                return data
+            except zlib.error:
+                self._raw_deflate = True
+                self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._decompressor.decompress(chunk)
+
+    def _fill(self, amt):
+        parts = [self._buffer]
+        size = len(self._buffer)
+        while not self._eof and (amt is None or size < amt):
+            chunk = self._response.read(self.CHUNK_SIZE)
+            if chunk:
+                data = self._decompress(chunk)
+            else:
+                data = self._decompressor.flush()
+                self._eof = True
+            parts.append(data)
+            size += len(data)
+        self._buffer = b''.join(parts)
+
+    def read(self, amt=None):
+        self._fill(amt)
+        if amt is None:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:amt], self._buffer[amt:]
+        return data
+
+    def info(self):
+        return self.headers
+
+    def getcode(self):
+        return self.code
+
+    def geturl(self):
+        return self.url
+
+    def close(self):
+        self._response.close()
+
+
+class _PrefixedResponse(object):
+    """Response whose body has been partly read already.
+
+    It is returned for GET requests whose body turned out too large to
+    be remembered; the rest of the body is still read from the
+    connection.
+
+       :param prefix: Bytes of the body read so far.
+       :param response: Response the rest of the body is read from.
+    """
+    def __init__(self, prefix, response):
+        self._prefix = prefix
+        self._response = response
+        self.url = response.geturl()
+        self.code = response.getcode()
+        self.headers = response.info()
+
+    def read(self, amt=None):
+        if amt is None:
+            data, self._prefix = self._prefix + self._response.read(), b''
+            return data
+        if self._prefix:
+            data, self._prefix = self._prefix[:amt], self._prefix[amt:]
+            return data
+        return self._response.read(amt)
+
+    def info(self):
+        return self.headers
+
+    def getcode(self):
+        return self.code
+
+    def geturl(self):
+        return self.url
+
+    def close(self):
+        self._prefix = b''
+        self._response.close()
+
+
+def _decoded(response):
+    encoding = (response.info().get('Content-Encoding') or '').strip().lower()
+    if encoding in ('gzip', 'x-gzip', 'deflate'):
+        return DecodedResponse(response, encoding)
+    return response
+
+
 class HTTPSession(object):
     """Handles HTTP activity while keeping headers persisting across requests.
 
+    Bodies of GET responses carrying an ``ETag`` or ``Last-Modified``
+    header are remembered per URL, unless they are larger than
+    ``max_body_size`` bytes. Subsequent GETs send ``If-None-Match`` /
+    ``If-Modified-Since`` and a ``304 Not Modified`` answer is served
+    from the remembered body. Larger bodies, such as cells feeds, are
+    streamed from the connection and not remembered.
+
+    Requests are sent over persistent connections kept in a
+    :class:`~gspread.pool.ConnectionPool`, so consecutive requests to
+    the same host skip the TCP and TLS handshakes.
+
+    Unless ``compress`` is false, ``gzip`` and ``deflate`` encodings
+    are advertised and compressed responses are transparently
+    decompressed while read.
+
        :param headers: A dict with initial headers.
+       :param max_validators: Maximum number of remembered responses;
+                              0 disables conditional requests.
+       :param pool: (optional) :class:`~gspread.pool.ConnectionPool` to use,
+                    may be shared between sessions.
+       :param compress: Whether to ask for compressed responses.
+       :param max_body_size: Maximum size of a remembered body in bytes.
     """
-    def __init__(self, headers=None):
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, headers=None, max_validators=64, pool=None, compress=True,
+                 max_body_size=128 * 1024):
         self.headers = headers or {}
+        self.max_validators = max_validators
+        self.max_body_size = max_body_size
+        self.validators = OrderedDict()
+        self._validators_lock = threading.Lock()
+        self.pool = pool or ConnectionPool()
+        self.compress = compress
 
     def request(self, method, url, data=None, headers=None):
         if data and not isinstance(data, basestring):
@@ -39,15 +225,13 @@ class HTTPSession(object):
         if data is not None:
             data = data.encode()
 
-        req = request.Request(url, data)
-
-        if method == 'put':
-            req.get_method = lambda: 'PUT'
+        request_headers = self.headers.copy()
 
-        if method == 'delete':
-            req.get_method = lambda: 'DELETE'
+        if data is not None:
+            request_headers['Content-Type'] = 'application/x-www-form-urlencoded'
 
-        request_headers = self.headers.copy()
+        if self.compress:
+            request_headers.setdefault('Accept-Encoding', 'gzip, deflate')
 
         if headers:
             for k, v in headers.items():
@@ -56,14 +240,87 @@ class HTTPSession(object):
                 else:
                     request_headers[k] = v
 
-        for k, v in request_headers.items():
-            req.add_header(k, v)
+        if method == 'get':
+            return self._conditional_get(url, request_headers)
+
+        # Any modification may change what GETs of this URL return
+        self._forget(url)
+
+        return self._open(method, url, data, request_headers)
+
+    def _open(self, method, url, data, request_headers):
+        try:
+            return _decoded(self.pool.urlopen(method, url, data, request_headers))
+        except HTTPError as e:
+            if not e.hdrs or not e.hdrs.get('Content-Encoding'):
+                raise e
+            content = _decoded(e).read()
+            raise HTTPError(e.url, e.code, e.msg, e.hdrs, io.BytesIO(content))
+
+    def _recall(self, url):
+        with self._validators_lock:
+            cached = self.validators.pop(url, None)
+            if cached is not None:
+                self.validators[url] = cached
+            return cached
+
+    def _remember(self, url, validators):
+        with self._validators_lock:
+            self.validators.pop(url, None)
+            self.validators[url] = validators
+            while len(self.validators) > self.max_validators:
+                self.validators.popitem(last=False)
+
+    def _forget(self, url):
+        with self._validators_lock:
+            self.validators.pop(url, None)
+
+    def _conditional_get(self, url, request_headers):
+        cached = self._recall(url)
+        if cached is not None:
+            etag, last_modified, response = cached
+            if etag:
+                request_headers.setdefault('If-None-Match', etag)
+            if last_modified:
+                request_headers.setdefault('If-Modified-Since', last_modified)
 
         try:
-            return request.urlopen(req)
+            r = self._open('get', url, None, request_headers)
         except HTTPError as e:
+            if e.code == 304 and cached is not None:
+                return CachedResponse(url, response.code, response.headers, response.body)
             raise e
 
+        headers = r.info()
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not self.max_validators or not (etag or last_modified):
+            self._forget(url)
+            return r
+
+        parts = []
+        size = 0
+        while size <= self.max_body_size:
+            chunk = r.read(min(self.CHUNK_SIZE, self.max_body_size + 1 - size))
+            if not chunk:
+                break
+            parts.append(chunk)
+            size += len(chunk)
+
+        if size > self.max_body_size:
+            self._forget(url)
+            return _PrefixedResponse(b''.join(parts), r)
+
+        response = CachedResponse(url, r.getcode(), headers, b''.join(parts))
+        r.close()
+        self._remember(url, (etag, last_modified, response))
+        return CachedResponse(url, response.code, headers, response.body)
+
+    def clear_validators(self):
+        """Forgets all remembered responses."""
+        with self._validators_lock:
+            self.validators.clear()
+
     def get(self, url, **kwargs):
         return self.request('get', url, **kwargs)
 
@@ -77,4 +334,7 @@ class HTTPSession(object):
         return self.request('put', url, data=data, **kwargs)
 
     def add_header(self, name, value):
+        if name.lower() == 'authorization':
+            # Remembered bodies belong to the previous credentials
+            self.clear_validators()
         self.headers[name] = value
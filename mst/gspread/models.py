@@ -8,17 +8,17 @@ This module contains common spreadsheets' models
 
 """
 import re
-from collections import defaultdict
-from itertools import chain
+from multiprocessing.pool import ThreadPool
 
 from xml.etree import ElementTree
 from xml.etree.ElementTree import Element, SubElement
 
 from .ns import _ns, _ns1, ATOM_NS, BATCH_NS, SPREADSHEET_NS
 from .urls import construct_url
-from .utils import finditem, numericise_all
+from .utils import finditem, numericise_all, dense_matrix
 
-from .exceptions import IncorrectCellLabel, WorksheetNotFound, CellNotFound
+from .exceptions import (IncorrectCellLabel, WorksheetNotFound, CellNotFound,
+                         UpdateCellError)
 
 
 try:
@@ -26,6 +26,11 @@ try:
 except NameError:
     basestring = unicode = str
 
+try:
+    from sys import intern
+except ImportError:
+    pass
+
 
 # Patch ElementTree._escape_attrib
 _elementtree_escape_attrib = ElementTree._escape_attrib
@@ -52,6 +57,7 @@ class Spreadsheet(object):
         id_parts = feed_entry.find(_ns('id')).text.split('/')
         self.id = id_parts[-1]
         self._sheet_list = []
+        self._sheet_index = None
 
     def get_id_fields(self):
         return {'spreadsheet_id': self.id}
@@ -82,6 +88,7 @@ class Spreadsheet(object):
 
         worksheet = Worksheet(self, elem)
         self._sheet_list.append(worksheet)
+        self._sheet_index = None
 
         return worksheet
 
@@ -93,8 +100,20 @@ class Spreadsheet(object):
         """
         self.client.del_worksheet(worksheet)
         self._sheet_list.remove(worksheet)
+        self._sheet_index = None
+
 
 
+    def _find_worksheet(self, title):
+        if self._sheet_index is None:
+            self._sheet_index = {}
+            for sheet in self._sheet_list:
+                self._sheet_index.setdefault(sheet.title, sheet)
+
+        try:
+            return self._sheet_index[title]
+        except KeyError:
+            raise WorksheetNotFound(title)
 
     def worksheets(self):
         """Returns a list of all :class:`worksheets <Worksheet>` in a spreadsheet.
@@ -122,10 +141,7 @@ class Spreadsheet(object):
         if not self._sheet_list:
             self._fetch_sheets()
 
-        try:
-            return finditem(lambda x: x.title == title, self._sheet_list)
-        except StopIteration:
-            raise WorksheetNotFound(title)
+        return self._find_worksheet(title)
 
 
     def get_worksheet(self, index):
@@ -166,6 +182,7 @@ class Worksheet(object):
         self._title = element.find(_ns('title')).text
         self._element = element
         self.version = element.find(_ns("link[@rel='edit']")).attrib['href'].split('/')[-1]
+        self._snapshot = None
 
     def __repr__(self):
         return '<%s "%s" id:%s>' % (self.__class__.__name__,
@@ -208,10 +225,47 @@ class Worksheet(object):
         return finditem(lambda x: x.get('rel') == link_type,
                 feed.findall(_ns('link')))
 
-    def _fetch_cells(self):
-        feed = self.client.get_cells_feed(self)
+    def _fetch_cells(self, params=None):
+        feed = self.client.get_cells_feed(self, params=params)
         return [Cell(self, elem) for elem in feed.findall(_ns('entry'))]
 
+    def _iter_cells(self, params=None):
+        return self.client.iter_cells_feed(self, params=params)
+
+    def _fetch_values(self, params):
+        return list(self._iter_cells(params))
+
+    def _iter_bands(self, queries, band_rows=None, workers=4):
+        """Yields `(row, col, value)` tuples of all given cells feed
+        queries.
+
+        With `band_rows`, every query is further split into bands of
+        that many rows using `min-row` and `max-row` parameters. Bands
+        are downloaded concurrently by up to `workers` threads and
+        yielded as they arrive, so cells are not in feed order.
+
+        """
+        if band_rows:
+            row_count = self.row_count
+            queries = [dict(params, **{'min-row': first,
+                                       'max-row': min(first + band_rows - 1, row_count)})
+                       for params in queries
+                       for first in range(1, row_count + 1, band_rows)]
+
+        if not band_rows or workers <= 1 or len(queries) <= 1:
+            for params in queries:
+                for cell in self._iter_cells(params or None):
+                    yield cell
+            return
+
+        pool = ThreadPool(min(workers, len(queries)))
+        try:
+            for cells in pool.imap_unordered(self._fetch_values, queries):
+                for cell in cells:
+                    yield cell
+        finally:
+            pool.terminate()
+
     _MAGIC_NUMBER = 64
     _cell_addr_re = re.compile(r'([A-Za-z]+)(\d+)')
     def get_int_addr(self, label):
@@ -316,22 +370,47 @@ class Worksheet(object):
                                                         'return-empty': 'true'})
         return [Cell(self, elem) for elem in feed.findall(_ns('entry'))]
 
-    def get_all_values(self):
-        """Returns a list of lists containing all cells' values as strings."""
-        cells = self._fetch_cells()
+    def get_all_values(self, band_rows=None, workers=4):
+        """Returns a list of lists containing all cells' values as strings.
 
-        # defaultdicts fill in gaps for empty rows/cells not returned by gdocs
-        rows = defaultdict(lambda: defaultdict(str))
-        for cell in cells:
-            row = rows.setdefault(int(cell.row), defaultdict(str))
-            row[cell.col] = cell.value
+        :param band_rows: (optional) Download the worksheet in bands of
+                          this many rows, concurrently.
+        :param workers: Maximum number of bands downloaded at once.
+
+        """
+        cells = self._iter_bands([{}], band_rows, workers)
 
         # we return a whole rectangular region worth of cells, including empties
-        all_row_keys = chain.from_iterable(row.keys() for row in rows.values())
-        rect_cols = range(1, max(all_row_keys)+1)
-        rect_rows = range(1, max(rows.keys())+1)
+        return dense_matrix(cells)
+
+    def get_cols_values(self, cols, band_rows=None, workers=4):
+        """Returns a list of lists containing values of specified columns
+        only, in the order they were given.
+
+        Every run of adjacent columns is downloaded with a single request
+        restricted with `min-col` and `max-col` feed parameters.
+
+        :param cols: List of column numbers. Columns start at index 1.
+        :param band_rows: (optional) Download the columns in bands of
+                          this many rows, concurrently.
+        :param workers: Maximum number of requests made at once.
+
+        """
+        position = dict((col, i) for i, col in enumerate(cols))
+
+        runs = []
+        for col in sorted(position):
+            if runs and runs[-1][1] == col - 1:
+                runs[-1][1] = col
+            else:
+                runs.append([col, col])
+
+        queries = [{'min-col': min_col, 'max-col': max_col}
+                   for min_col, max_col in runs]
+        cells = ((row, position[col] + 1, value)
+                 for row, col, value in self._iter_bands(queries, band_rows, workers))
 
-        return [[rows[i][j] for j in rect_cols] for i in rect_rows]
+        return dense_matrix(cells, len(cols))
 
     def get_all_records(self, empty2zero=False):
         """Returns a list of dictionaries, all of them having:
@@ -352,21 +431,27 @@ class Worksheet(object):
         return [dict(zip(keys, row)) for row in values]
 
 
-    def _list_values(self, index, cell_tuple, position):
-        cells_list = self._fetch_cells()
-        cells = dict(map(cell_tuple, filter(position, cells_list)))
+    def _list_values(self, index, axis):
+        """Returns values of row (`axis` 0) or column (`axis` 1) `index`.
 
-        try:
-            last_index = max(cells.keys())
-        except ValueError:
-            return []
+        Cells are taken from the snapshot if the worksheet keeps one,
+        otherwise only the row or column is requested from the feed.
 
-        vals = []
-        for i in range(1, last_index + 1):
-            c = cells.get(i)
-            vals.append(c.value if c else None)
+        """
+        if self._snapshot is not None:
+            cells = [(cell.row, cell.col, cell.value)
+                     for cell in self._snapshot.cells
+                     if (cell.row, cell.col)[axis] == index]
+        else:
+            name = ('row', 'col')[axis]
+            cells = self._iter_cells({'min-%s' % name: index,
+                                      'max-%s' % name: index})
+
+        values = dict((cell[1 - axis], cell[2]) for cell in cells)
+        if not values:
+            return []
 
-        return vals
+        return [values.get(i) for i in range(1, max(values) + 1)]
 
     def row_values(self, row):
         """Returns a list of all values in a `row`.
@@ -374,9 +459,7 @@ class Worksheet(object):
         Empty cells in this list will be rendered as :const:`None`.
 
         """
-        return self._list_values(row,
-                                 lambda cell: (cell.col, cell),
-                                 lambda cell: cell.row == row)
+        return self._list_values(row, 0)
 
     def col_values(self, col):
         """Returns a list of all values in column `col`.
@@ -384,9 +467,7 @@ class Worksheet(object):
         Empty cells in this list will be rendered as :const:`None`.
 
         """
-        return self._list_values(col,
-                                 lambda cell: (cell.row, cell),
-                                 lambda cell: cell.col == col)
+        return self._list_values(col, 1)
 
     def update_acell(self, label, val):
         """Sets the new value to a cell.
@@ -418,6 +499,7 @@ class Worksheet(object):
         uri = self._get_link('edit', feed).get('href')
 
         self.client.put_feed(uri, ElementTree.tostring(feed))
+        self._snapshot = None
 
     def _create_update_feed(self, cell_list):
         feed = Element('feed', {'xmlns': ATOM_NS,
@@ -431,16 +513,13 @@ class Worksheet(object):
         for cell in cell_list:
             entry = SubElement(feed, 'entry')
 
-            SubElement(entry, 'batch:id').text = cell.element.find(_ns('title')).text
+            SubElement(entry, 'batch:id').text = cell.title
             SubElement(entry, 'batch:operation', {'type': 'update'})
-            SubElement(entry, 'id').text = cell.element.find(_ns('id')).text
-
-            edit_link = finditem(lambda x: x.get('rel') == 'edit',
-                    cell.element.findall(_ns('link')))
+            SubElement(entry, 'id').text = cell.id
 
             SubElement(entry, 'link', {'rel': 'edit',
-                                       'type': edit_link.get('type'),
-                                       'href': edit_link.get('href')})
+                                       'type': cell.edit_type,
+                                       'href': cell.edit_href})
 
             SubElement(entry, 'gs:cell', {'row': str(cell.row),
                                           'col': str(cell.col),
@@ -455,6 +534,55 @@ class Worksheet(object):
         """
         feed = self._create_update_feed(cell_list)
         self.client.post_cells(self, ElementTree.tostring(feed))
+        self._snapshot = None
+
+    def _post_batch(self, cell_list):
+        feed = self._create_update_feed(cell_list)
+        result = self.client.post_cells(self, ElementTree.tostring(feed))
+        self._snapshot = None
+
+        for entry in result.findall(_ns('entry')):
+            status = entry.find('{%s}status' % BATCH_NS)
+            if status is not None and status.get('code') not in ('200', '201'):
+                batch_id = entry.findtext('{%s}id' % BATCH_NS)
+                raise UpdateCellError('%s: %s %s' % (batch_id, status.get('code'),
+                                                     status.get('reason')))
+        return len(cell_list)
+
+    def update_values(self, values, chunk_size=None, workers=1):
+        """Sets values of cells at given positions in batch.
+
+        Unlike :meth:`update_cells` it does not need fetched
+        :class:`Cell` objects; entries of the batch are derived from
+        cell positions. Cells are sent in batches of `chunk_size`
+        cells, up to `workers` batches at once.
+
+        :param values: Iterable of `(row, col, value)` tuples.
+        :param chunk_size: (optional) Maximum number of cells in one batch.
+        :param workers: Maximum number of batches sent at once.
+
+        :raises UpdateCellError: if the API rejects an update.
+
+        Returns number of updated cells.
+        """
+        feed_url = construct_url('cells', self)
+        cell_list = [Cell.at(self, row, col, value, feed_url)
+                     for row, col, value in values]
+        if not cell_list:
+            return 0
+
+        chunk_size = chunk_size or len(cell_list)
+        chunks = [cell_list[i:i + chunk_size]
+                  for i in range(0, len(cell_list), chunk_size)]
+
+        if workers <= 1 or len(chunks) <= 1:
+            return sum(self._post_batch(chunk) for chunk in chunks)
+
+        pool = ThreadPool(min(workers, len(chunks)))
+        try:
+            return sum(pool.map(self._post_batch, chunks))
+        finally:
+            pool.terminate()
 
     def resize(self, rows=None, cols=None):
         """Resizes the worksheet.
@@ -479,6 +607,7 @@ class Worksheet(object):
 
         # Send request and store result
         self._element = self.client.put_feed(uri, ElementTree.tostring(feed))
+        self._snapshot = None
 
     def add_rows(self, rows):
         """Adds rows to worksheet.
@@ -500,54 +629,149 @@ class Worksheet(object):
 
         :param values: List of values for the new row.
         """
-        self.add_rows(1)
-        new_row = self.row_count
-        data_width = len(values)
-        if self.col_count < data_width:
-            self.resize(cols=data_width)
+        self.append_rows([values])
+
+    def append_rows(self, rows):
+        """Adds rows to the worksheet and populates them with values.
+        Widens the worksheet if there are more values than columns.
+
+        The worksheet is resized once, all new cells are fetched with
+        a single range query and updated with a single batch request,
+        regardless of the number of rows and values.
+
+        :param rows: List of lists of values for the new rows.
+        """
+        if not rows:
+            return
 
+        first_row = self.row_count + 1
+        last_row = self.row_count + len(rows)
+        data_width = max(len(values) for values in rows)
+        cols = data_width if self.col_count < data_width else None
+        self.resize(rows=last_row, cols=cols)
+
+        if not data_width:
+            return
+
+        cell_range = '%s:%s' % (self.get_addr_int(first_row, 1),
+                                self.get_addr_int(last_row, data_width))
         cell_list = []
-        for i, value in enumerate(values, start=1):
-            cell = self.cell(new_row, i)
-            cell.value = value
-            cell_list.append(cell)
+        for cell in self.range(cell_range):
+            values = rows[cell.row - first_row]
+            if cell.col <= len(values):
+                cell.value = values[cell.col - 1]
+                cell_list.append(cell)
 
         self.update_cells(cell_list)
 
-    def _finder(self, func, query):
-        cells = self._fetch_cells()
+    def snapshot(self, refresh=False):
+        """Returns a :class:`WorksheetSnapshot` of all cells.
 
-        if isinstance(query, basestring):
-            match = lambda x: x.value == query
-        else:
-            match = lambda x: query.search(x.value)
+        The cells feed is downloaded once and the snapshot is reused
+        until `refresh` is requested or the worksheet is updated
+        through this object. Changes made by others are not seen
+        before a refresh.
 
-        return func(match, cells)
+        :param refresh: Whether to download the cells feed again.
+        """
+        if refresh or self._snapshot is None:
+            self._snapshot = WorksheetSnapshot(self, self._fetch_cells())
+        return self._snapshot
 
     def find(self, query):
         """Finds first cell matching query.
 
         :param query: A text string or compiled regular expression.
         """
-        try:
-            return self._finder(finditem, query)
-        except StopIteration:
-            raise CellNotFound(query)
+        return self.snapshot().find(query)
 
     def findall(self, query):
         """Finds all cells matching query.
 
         :param query: A text string or compiled regular expression.
         """
-        return self._finder(filter, query)
+        return self.snapshot().findall(query)
+
+
+class WorksheetSnapshot(object):
+    """Cells of a :class:`worksheet <Worksheet>` downloaded at once and
+    indexed by value.
+
+    Text queries are answered from a hash index, regular expressions
+    are matched against the cells kept in memory. Cells are in feed
+    order, i.e. by rows.
+
+    """
+    def __init__(self, worksheet, cells):
+        self.worksheet = worksheet
+        self.cells = cells
+        self._by_value = {}
+        self._by_col = None
+        for cell in cells:
+            self._by_value.setdefault(cell.value, []).append(cell)
+
+    def __repr__(self):
+        return '<%s "%s" cells:%s>' % (self.__class__.__name__,
+                                        self.worksheet.title,
+                                        len(self.cells))
+
+    def _column_index(self, col):
+        if self._by_col is None:
+            self._by_col = {}
+            for cell in self.cells:
+                self._by_col.setdefault(cell.col, {}) \
+                            .setdefault(cell.value, []).append(cell)
+        return self._by_col.get(col, {})
+
+    def findall(self, query, col=None):
+        """Finds all cells matching query.
+
+        :param query: A text string or compiled regular expression.
+        :param col: (optional) Number of the only column to search.
+        """
+        if isinstance(query, basestring):
+            index = self._by_value if col is None else self._column_index(col)
+            return list(index.get(query, ()))
+
+        cells = self.cells
+        if col is not None:
+            cells = [cell for cell in cells if cell.col == col]
+        return [cell for cell in cells
+                if cell.value is not None and query.search(cell.value)]
+
+    def find(self, query, col=None):
+        """Finds first cell matching query.
+
+        :param query: A text string or compiled regular expression.
+        :param col: (optional) Number of the only column to search.
+
+        :raises CellNotFound: if no cell matches.
+        """
+        if isinstance(query, basestring):
+            index = self._by_value if col is None else self._column_index(col)
+            cells = index.get(query)
+            if cells:
+                return cells[0]
+            raise CellNotFound(query)
+
+        for cell in self.cells:
+            if (col is None or cell.col == col) and \
+                    cell.value is not None and query.search(cell.value):
+                return cell
+        raise CellNotFound(query)
 
 
 class Cell(object):
     """An instance of this class represents a single cell in a :class:`worksheet <Worksheet>`.
 
+    Only the position, the value and the strings needed for batch
+    updates are kept; the feed element the cell was read from is not
+    referenced afterwards.
+
     """
+    __slots__ = ('_row', '_col', 'value', 'title', 'id', 'edit_href', 'edit_type')
+
     def __init__(self, worksheet, element):
-        self.element = element
         cell_elem = element.find(_ns1('cell'))
         self._row = int(cell_elem.get('row'))
         self._col = int(cell_elem.get('col'))
@@ -555,6 +779,39 @@ class Cell(object):
         #: Value of the cell.
         self.value = cell_elem.text
 
+        #: Title of the cell entry, e.g. 'A1'.
+        self.title = element.findtext(_ns('title'))
+        #: Id of the cell entry.
+        self.id = element.findtext(_ns('id'))
+
+        edit_link = element.find(_ns("link[@rel='edit']"))
+        if edit_link is not None:
+            # all cells share the same link type, keep a single copy
+            link_type = edit_link.get('type')
+            self.edit_href = edit_link.get('href')
+            self.edit_type = intern(link_type) if link_type else link_type
+        else:
+            self.edit_href = self.edit_type = None
+
+    @classmethod
+    def at(cls, worksheet, row, col, value, feed_url=None):
+        """Creates a cell at given position without fetching its entry.
+
+        The entry id and edit link are derived from the cells feed URL,
+        which is enough for batch updates.
+
+        :param feed_url: (optional) URL of the worksheet's cells feed.
+        """
+        cell = cls.__new__(cls)
+        cell._row = row
+        cell._col = col
+        cell.value = value
+        cell.title = worksheet.get_addr_int(row, col)
+        cell.id = '%s/R%sC%s' % (feed_url or construct_url('cells', worksheet), row, col)
+        cell.edit_href = cell.id
+        cell.edit_type = 'application/atom+xml'
+        return cell
+
     @property
     def row(self):
         """Row number of the cell."""
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+
+"""
+gspread.pool
+~~~~~~~~~~~~
+
+This module contains a pool of persistent HTTP connections.
+
+"""
+
+import base64
+import io
+import threading
+import time
+
+try:
+    import httplib as http_client
+    from urlparse import urlsplit, urljoin, unquote
+    from urllib import getproxies, proxy_bypass
+    from urllib2 import HTTPError
+except ImportError:
+    from http import client as http_client
+    from urllib.parse import urlsplit, urljoin, unquote
+    from urllib.request import getproxies, proxy_bypass
+    from urllib.error import HTTPError
+
+
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 5
+
+# Methods that may be redirected without changing them, as urllib does
+_REDIRECTED_METHODS = ('GET', 'HEAD')
+
+# Errors meaning that the server has closed an idle keep-alive connection;
+# timeouts are not among them
+try:
+    _STALE_ERRORS = (http_client.BadStatusLine, http_client.CannotSendRequest,
+                     ConnectionResetError, BrokenPipeError)
+except NameError:
+    _STALE_ERRORS = (http_client.BadStatusLine, http_client.CannotSendRequest)
+
+# Methods that may be sent again after the server has received them
+_SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class PooledResponse(object):
+    """Response read from a pooled connection.
+
+    The connection goes back to the pool once the body is read to the
+    end. A response closed before that drops its connection.
+
+       :param pool: :class:`ConnectionPool` the connection belongs to.
+       :param key: Pool key of the connection.
+       :param connection: Connection the response is read from.
+       :param response: :class:`http.client.HTTPResponse` instance.
+       :param url: Requested URL.
+    """
+    def __init__(self, pool, key, connection, response, url):
+        self._pool = pool
+        self._key = key
+        self._connection = connection
+        self._response = response
+        self.url = url
+        self.code = response.status
+        self.headers = response.msg
+
+    def read(self, amt=None):
+        if self._connection is None:
+            return b''
+        data = self._response.read() if amt is None else self._response.read(amt)
+        if self._response.isclosed():
+            self._release()
+        return data
+
+    def info(self):
+        return self.headers
+
+    def getcode(self):
+        return self.code
+
+    def geturl(self):
+        return self.url
+
+    def close(self):
+        if self._connection is not None:
+            if not self._response.isclosed():
+                self._connection.close()
+            self._release()
+
+    def _release(self):
+        connection, self._connection = self._connection, None
+        if self._response.will_close:
+            connection.close()
+        else:
+            self._pool.release(self._key, connection)
+
+
+class ConnectionPool(object):
+    """Keeps persistent HTTP(S) connections, reused across requests.
+
+    At most ``max_idle`` idle connections are kept per host and
+    connections idle for longer than ``idle_timeout`` seconds are
+    closed instead of being reused. The pool can be shared by threads;
+    a connection is used by one request at a time.
+
+       :param max_idle: Maximum number of idle connections per host.
+       :param idle_timeout: Seconds after which an idle connection is dropped.
+       :param timeout: Socket timeout of new connections.
+       :param proxies: (optional) A dict mapping URL schemes to proxy URLs.
+                       Defaults to proxies configured in the environment,
+                       like :func:`urllib.request.urlopen` uses.
+    """
+    def __init__(self, max_idle=4, idle_timeout=60, timeout=None, proxies=None):
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.proxies = getproxies() if proxies is None else proxies
+        self.connections_made = 0
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _proxy(self, scheme, host):
+        """Returns split URL of the proxy to use for the host or ``None``."""
+        proxy = self.proxies.get(scheme)
+        if not proxy or proxy_bypass(host):
+            return None
+        if '://' not in proxy:
+            proxy = 'http://' + proxy
+        return urlsplit(proxy)
+
+    def _proxy_headers(self, proxy):
+        if not proxy.username:
+            return {}
+        credentials = '%s:%s' % (unquote(proxy.username), unquote(proxy.password or ''))
+        token = base64.b64encode(credentials.encode('utf-8')).decode('ascii')
+        return {'Proxy-Authorization': 'Basic %s' % token}
+
+    def _connect(self, key):
+        scheme, host, port = key
+        cls = http_client.HTTPSConnection if scheme == 'https' else http_client.HTTPConnection
+        kwargs = {} if self.timeout is None else {'timeout': self.timeout}
+        with self._lock:
+            self.connections_made += 1
+
+        proxy = self._proxy(scheme, host)
+        if proxy is None:
+            return cls(host, port, **kwargs)
+        if scheme != 'https':
+            return cls(proxy.hostname, proxy.port or 80, **kwargs)
+
+        # HTTPS goes through a CONNECT tunnel, TLS is end to end
+        connection = cls(proxy.hostname, proxy.port or 80, **kwargs)
+        connection.set_tunnel(host, port, self._proxy_headers(proxy))
+        return connection
+
+    def acquire(self, key):
+        """Returns an idle connection to the host or ``None``."""
+        now = time.time()
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                connection, since = idle.pop()
+                if now - since <= self.idle_timeout:
+                    return connection
+                connection.close()
+        return None
+
+    def release(self, key, connection):
+        """Puts a connection back to the pool, or closes it if the pool is full."""
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append((connection, time.time()))
+                return
+        connection.close()
+
+    def clear(self):
+        """Closes all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection, since in connections:
+                connection.close()
+
+    def _send(self, key, method, path, body, headers):
+        connection = self.acquire(key)
+        if connection is not None:
+            try:
+                connection.request(method, path, body, headers)
+            except _STALE_ERRORS:
+                # the request did not get out, send it on a new connection
+                connection.close()
+            except Exception:
+                connection.close()
+                raise
+            else:
+                try:
+                    return connection, connection.getresponse()
+                except _STALE_ERRORS:
+                    # the server may have received the request, so only
+                    # safe methods are sent again
+                    connection.close()
+                    if method not in _SAFE_METHODS:
+                        raise
+                except Exception:
+                    connection.close()
+                    raise
+
+        connection = self._connect(key)
+        try:
+            connection.request(method, path, body, headers)
+            return connection, connection.getresponse()
+        except Exception:
+            connection.close()
+            raise
+
+    def urlopen(self, method, url, body=None, headers=None):
+        """Sends a request and returns :class:`PooledResponse`.
+
+        Redirects are followed the way :func:`urllib.request.urlopen`
+        follows them: GET and HEAD requests are redirected as they are,
+        POSTs are turned into GETs on 301, 302 and 303, and other
+        redirects raise :class:`HTTPError`, as do all responses other
+        than 2xx.
+
+        """
+        headers = dict(headers or {})
+        method = method.upper()
+        for i in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            key = (parts.scheme, parts.hostname, parts.port)
+            path = parts.path or '/'
+            if parts.query:
+                path = '%s?%s' % (path, parts.query)
+
+            request_headers = headers
+            proxy = self._proxy(parts.scheme, parts.hostname)
+            if proxy is not None and parts.scheme != 'https':
+                # plain HTTP proxies take absolute URLs
+                path = '%s://%s%s' % (parts.scheme, parts.netloc, path)
+                request_headers = dict(headers, **self._proxy_headers(proxy))
+
+            connection, response = self._send(key, method, path, body, request_headers)
+            r = PooledResponse(self, key, connection, response, url)
+            if 200 <= r.code < 300:
+                return r
+
+            content = r.read()
+            if r.code in REDIRECT_CODES and r.headers.get('Location') and \
+                    (method in _REDIRECTED_METHODS or
+                     (method == 'POST' and r.code in (301, 302, 303))):
+                url = urljoin(url, r.headers['Location'])
+                if method == 'POST':
+                    # urllib resends POSTs as GETs without body
+                    method, body = 'GET', None
+                    headers.pop('Content-Type', None)
+                continue
+
+            raise HTTPError(url, r.code, response.reason, r.headers, io.BytesIO(content))
+
+        raise HTTPError(url, r.code, 'Too many redirects', r.headers, io.BytesIO(content))
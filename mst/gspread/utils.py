@@ -8,8 +8,11 @@ This module contains utility functions.
 
 """
 
+from operator import itemgetter
 from xml.etree import ElementTree
 
+from .ns import _ns, _ns1
+
 
 def finditem(func, seq):
     """Finds and returns first item in iterable for which func(item) is True.
@@ -46,6 +49,68 @@ def _ds(elem):
     return ElementTree.tostring(elem)
 
 
+def iter_entries(source):
+    """Parses an Atom feed incrementally and yields its entry elements.
+
+    Each entry is cleared from the tree once the consumer moves on to
+    the next one, so memory use does not grow with the size of the feed.
+
+    :param source: A file-like object the feed is read from.
+
+    """
+    entry_tag = _ns('entry')
+    root = None
+
+    for event, elem in ElementTree.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+        elif elem.tag == entry_tag:
+            yield elem
+            root.clear()
+
+
+def iter_cells(source):
+    """Parses a cells feed incrementally and yields `(row, col, value)`
+    tuples, with `row` and `col` starting at 1.
+
+    :param source: A file-like object the feed is read from.
+
+    """
+    cell_tag = _ns1('cell')
+
+    for entry in iter_entries(source):
+        cell = entry.find(cell_tag)
+        if cell is not None:
+            yield (int(cell.get('row')), int(cell.get('col')), cell.text)
+
+
+def dense_matrix(cells, col_count=0):
+    """Builds a list of lists of strings from `(row, col, value)` tuples.
+
+    The matrix spans from the first cell to the last row and the last
+    column holding a cell, however large the worksheet grid is. It is
+    allocated once, when the extent is known, and filled in place.
+
+    :param cells: Iterable of `(row, col, value)` tuples, starting at 1.
+    :param col_count: Minimum number of columns.
+
+    """
+    if not isinstance(cells, list):
+        cells = list(cells)
+    if not cells:
+        return []
+
+    last_row = max(map(itemgetter(0), cells))
+    last_col = max(col_count, max(map(itemgetter(1), cells)))
+
+    matrix = [[''] * last_col for i in range(last_row)]
+    for row, col, value in cells:
+        matrix[row - 1][col - 1] = value
+
+    return matrix
+
+
 def numericise(value, empty2zero=False):
     """Returns a value that depends on the input string:
         - Float if input can be converted to Float
@@ -19,16 +19,28 @@
 import csv
 import mst.gspread as gspread
 from mst.exceptions import MstException
+from mst.mmapcsv import MmapCsvReader, decode_columns
+from mst.spreadsheet import Spreadsheet
 
 
 class Loader(object):
     '''
     Base loader class. All classes loading translation text data should
     derive from this one.
+
+    Loader can be given a list of column names required by a build. Rows
+    returned by such loader contain only those columns, in header order.
+    Requested columns missing in header are skipped.
     '''
-    def __init__(self):
+    def __init__(self, columns=None):
         self.__data = []
         self.__loaded = False
+        self.__columns = columns
+
+    @property
+    def columns(self):
+        """Names of projected columns or None if all columns are loaded"""
+        return self.__columns
 
     @property
     def data(self):
@@ -49,41 +61,138 @@ class Loader(object):
         else:
             raise RuntimeError('Data already loaded. Cannot overwrite.')
 
+    def stream(self):
+        '''
+        Return an iterator over rows. First row is a header. Loaders
+        capable of reading rows lazily should override this method.
+        '''
+        return iter(self.data)
+
+    def _project(self, rows):
+        '''
+        Restrict rows to projected columns. First row is a header.
+        Short rows are padded with empty strings.
+        '''
+        if self.columns is None:
+            yield from rows
+            return
+        rows = iter(rows)
+        header = next(rows, None)
+        if header is None:
+            return
+        indexes = [i for i, name in enumerate(header) if name in self.columns]
+        yield [header[i] for i in indexes]
+        for row in rows:
+            size = len(row)
+            yield [row[i] if i < size else '' for i in indexes]
+
 
 class LoaderCsv(Loader):
     '''
     This loader will load translation data from CSV file.
+
+    In streaming mode rows are not loaded up front. They are read lazily
+    from the file each time stream() is called and data stays empty.
+    It keeps memory usage constant regardless of the file size.
+
+    Two ingestion backends are available:
+        - csv - standard csv module, all fields are decoded
+        - mmap - file is memory mapped and only fields of projected
+          columns are decoded
+    The mmap backend implies streaming.
     '''
-    def __init__(self, file):
-            Loader.__init__(self)
+
+    BACKEND_CSV = 'csv'
+    BACKEND_MMAP = 'mmap'
+
+    def __init__(self, file, streaming=False, backend=BACKEND_CSV, columns=None):
+            Loader.__init__(self, columns)
             self.__file = file
+            self.__backend = backend
+            self.__streaming = streaming or backend == LoaderCsv.BACKEND_MMAP
+            self.__streamed_rows = 0
+
+            if backend not in (LoaderCsv.BACKEND_CSV, LoaderCsv.BACKEND_MMAP):
+                raise MstException("Unknown CSV backend: %s. Allowed: %s" % (backend, [LoaderCsv.BACKEND_CSV, LoaderCsv.BACKEND_MMAP]) )
             
             try:
                 csv_file = open(file, 'r')
             except:
                 raise MstException("Cannot open CSV file with resources: %s" % file)
             
+            if self.streaming:
+                csv_file.close()
+                return
+
             csv_reader = csv.reader(csv_file)
             rows = []
-            for row in csv_reader:
+            for row in self._project(csv_reader):
                 rows.append(row)
+            csv_file.close()
             self.data = rows
         
     def __str__(self):
-        return 'CSV loader, file %s, rows: %s' % (self.__file, self.rows)
+        return 'CSV loader, file %s, backend: %s, rows: %s' % (self.__file, self.backend, self.rows)
+
+    @property
+    def streaming(self):
+        return self.__streaming
+
+    @property
+    def backend(self):
+        return self.__backend
+
+    @property
+    def rows(self):
+        if self.streaming:
+            return self.__streamed_rows
+        return Loader.rows.fget(self)
+
+    def stream(self):
+        if self.streaming:
+            return self.__read_rows()
+        return Loader.stream(self)
+
+    def __read_rows(self):
+        '''Read CSV file row by row, counting rows on the way'''
+        self.__streamed_rows = 0
+        if self.backend == LoaderCsv.BACKEND_MMAP:
+            rows = decode_columns( MmapCsvReader(self.__file), self.columns, project=True )
+            for row in rows:
+                self.__streamed_rows += 1
+                yield row
+            return
+        with open(self.__file, 'r') as csv_file:
+            for row in self._project( csv.reader(csv_file) ):
+                self.__streamed_rows += 1
+                yield row
 
 class LoaderGoogle(Loader):
     '''
     This loader reads data from Google Docs spreadsheet. You must provide
     emails and password for loggin-in and spreadsheet name. By default
     it will read worksheet named 'strings'.
+
+    If columns are given, header row is fetched first and checked to
+    contain all of them, so a misconfigured worksheet fails before any
+    data is downloaded. Then only cells of projected columns are
+    downloaded.
+
+    If a WorksheetCache is given, cells are downloaded only if worksheet
+    was updated since data was cached.
+
+    If band_rows is given, cells are downloaded concurrently in bands of
+    that many rows.
     '''
-    def __init__(self, user, password, spreadsheet, worksheet = 'strings'):
-        Loader.__init__(self)
+    def __init__(self, user, password, spreadsheet, worksheet = 'strings', columns=None, cache=None, band_rows=None):
+        Loader.__init__(self, columns)
         self.__username = user
         self.__password = password
         self.__spreadsheet = spreadsheet
         self.__worksheet = worksheet
+        self.__cache = cache
+        self.__cached = False
+        self.__band_rows = band_rows
         self.__params = (self.username, self.password, self.spreadsheet, self.worksheet, self.rows)
         self.__load_data()
         
@@ -95,9 +204,37 @@ class LoaderGoogle(Loader):
             gc = gspread.login(self.username, self.password)
             spreadsheet = gc.open(self.spreadsheet)
             worksheet = spreadsheet.worksheet(self.worksheet)
-            self.data = worksheet.get_all_values()
+            data = None
+            if self.cache is not None:
+                data = self.cache.get(spreadsheet.id, worksheet.id, worksheet.updated, self.columns)
+                self.__cached = data is not None
+            if data is None:
+                if self.columns is None:
+                    data = worksheet.get_all_values(self.band_rows)
+                else:
+                    data = self.__load_columns(worksheet)
+                if self.cache is not None:
+                    self.cache.put(spreadsheet.id, worksheet.id, worksheet.updated, data, self.columns)
+            self.data = data
+        except MstException:
+            raise
         except:
             raise MstException("Cannot load Google Spreadsheet: %s" % str(self.__params) )
+
+    def __load_columns(self, worksheet):
+        '''
+        Download header row, validate and find projected columns in it
+        and download cells of those columns only.
+        '''
+        header = [value or '' for value in worksheet.row_values(1)]
+        Spreadsheet.validate_header(header, self.columns)
+        cols = [col for col, name in enumerate(header, start=1) if name in self.columns]
+        if not cols:
+            return [[]]
+        rows = worksheet.get_cols_values(cols, self.band_rows)
+        if rows:
+            rows[0] = [header[col - 1] for col in cols]
+        return rows
     
     @property
     def username(self):
@@ -113,4 +250,17 @@ class LoaderGoogle(Loader):
 
     @property
     def worksheet(self):
-        return self.__worksheet
\ No newline at end of file
+        return self.__worksheet
+
+    @property
+    def cache(self):
+        return self.__cache
+
+    @property
+    def band_rows(self):
+        return self.__band_rows
+
+    @property
+    def cached(self):
+        """True if data was loaded from cache"""
+        return self.__cached
\ No newline at end of file
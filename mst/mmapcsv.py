@@ -0,0 +1,141 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+CSV tokenizer working on memory mapped files.
+
+File contents are never decoded as a whole. Records are split into raw
+bytes fields and it is up to the caller to decode fields it is interested
+in. Remaining fields stay as untouched bytes.
+"""
+
+import mmap
+import re
+
+_BOM = b'\xef\xbb\xbf'
+_QUOTE = b'"'
+_FIELD = re.compile(rb'"((?:[^"]|"")*)(")?([^,]*)|([^,]*)')
+
+def _split_quoted(record, complete=False):
+    """
+    Split CSV record containing quotes the way csv.reader does with the
+    default dialect. Fields starting with a quote are unquoted, doubled
+    quotes are collapsed and text after the closing quote is kept.
+    Quotes inside unquoted fields are literal.
+
+    It returns None if a quoted field is not closed by the end of the
+    record, unless complete is True.
+    """
+    fields = []
+    pos = 0
+    end = len(record)
+    while True:
+        m = _FIELD.match(record, pos)
+        quoted, closing, trailing, plain = m.groups()
+        if quoted is not None:
+            if closing is None and not complete:
+                return None
+            fields.append( quoted.replace(b'""', _QUOTE) + trailing )
+        else:
+            fields.append( plain )
+        pos = m.end() + 1 # skip separator
+        if pos > end:
+            return fields
+
+class MmapCsvReader(object):
+    """
+    Iterate over CSV file records. Each record is a list of bytes fields.
+    Records without quotes, which are the majority in translation sheets,
+    are split with a single bytes operation. Quoted records may span
+    multiple lines.
+    """
+
+    def __init__(self, path):
+        self.__path = path
+
+    @property
+    def path(self):
+        return self.__path
+
+    def __iter__(self):
+        with open(self.path, 'rb') as file:
+            # mapping an empty file is not allowed
+            if file.seek(0, 2) == 0:
+                return
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield from self.__records(mapped)
+            finally:
+                mapped.close()
+
+    def __records(self, mapped):
+        readline = mapped.readline
+        line = readline()
+        if line.startswith(_BOM):
+            line = line[len(_BOM):]
+        while line:
+            if _QUOTE in line:
+                # newline inside quoted field continues the record
+                fields = _split_quoted( line.rstrip(b'\r\n') )
+                while fields is None:
+                    more = readline()
+                    if not more:
+                        fields = _split_quoted(line, complete=True)
+                        break
+                    line += more
+                    fields = _split_quoted( line.rstrip(b'\r\n') )
+                yield fields
+            else:
+                record = line.rstrip(b'\r\n')
+                yield record.split(b',') if record else []
+            line = readline()
+
+def decode_columns(records, columns=None, encoding='utf-8', project=False):
+    """
+    Decode CSV records produced by MmapCsvReader. First record is a header
+    and it is always decoded. In data records only fields of columns named
+    in columns are decoded; other fields are left as bytes. If columns is
+    None, all fields are decoded.
+
+    If project is True, records contain decoded fields of named columns
+    only (header included) and short records are padded with empty strings.
+    """
+    records = iter(records)
+    header = next(records, None)
+    if header is None:
+        return
+    header = [field.decode(encoding) for field in header]
+    if columns is None:
+        yield header
+        for record in records:
+            yield [field.decode(encoding) for field in record]
+        return
+    indexes = [i for i, name in enumerate(header) if name in columns]
+    if project:
+        yield [header[i] for i in indexes]
+        for record in records:
+            size = len(record)
+            yield [record[i].decode(encoding) if i < size else '' for i in indexes]
+        return
+    yield header
+    for record in records:
+        size = len(record)
+        for i in indexes:
+            if i < size:
+                record[i] = record[i].decode(encoding)
+        yield record
@@ -17,6 +17,7 @@
 #     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 
 import csv
+from collections.abc import Iterator
 from mst.exceptions import MstException
 from mst.resources import ResourceText, String, StringArray, QuantityStrings
 
@@ -47,35 +48,61 @@ class Spreadsheet(object):
     TYPE_STRING_ARRAY = 'string-array'
     TYPE_QUANTITY_STRING = 'plurals'
     
-    __resource_column_name = ''
-    __header = []
-    __data = []
-    __languages = []
-    
-    __type_column = -1
-    __id_column   = -1
-    __language_column = {}
-    __options_column = -1
-    
     def __init__(self, resource_column, data, languages):
         """
         Initialize Spreadsheet object.
         resource column -- name of column with resource IDs, for ex. 'android_id'
-        data -- data to be loaded (2D array of strings) or a path to CSV file
+        data -- data to be loaded (2D array of strings), a path to CSV file
+                or an iterator over rows
         languages -- array of language codes
+
+        If data is an iterator, the first row is read as a header and
+        resources are built while consuming remaining rows. Data rows are
+        not retained in such case, so data section is empty.
         """
         self.__resource_column_name = resource_column
         self.__languages = languages
+        self.__header = []
+        self.__data = []
+        self.__type_column = -1
+        self.__id_column = -1
+        self.__language_column = {}
+        self.__options_column = -1
+        self.__strings = None
+        self.__string_arrays = None
+        self.__quantity_strings = None
         
         if( type(data) == str ):
             self.__load_csv(data)
         elif( type(data) == list ):
             self.__load_data(data)
+        elif( isinstance(data, Iterator) ):
+            self.__header = next(data, [])
         else:
-            raise TypeError("We can parse only 2-dimensional arrays of string data or load CSV files")
+            raise TypeError("We can parse only 2-dimensional arrays of string data, row iterators or load CSV files")
         
         self.__parse_data()
+        if( isinstance(data, Iterator) ):
+            self.__parse_resources(data)
     
+    @staticmethod
+    def required_columns(resource_column, languages):
+        """
+        Names of columns needed to extract resources for a given
+        resource ID column and languages.
+        """
+        return [Spreadsheet.TYPE, resource_column] + list(languages) + [Spreadsheet.OPTIONS]
+
+    @staticmethod
+    def validate_header(header, columns):
+        """
+        Check that header row contains all given columns. It raises
+        MstException naming the first missing column.
+        """
+        for column in columns:
+            if column not in header:
+                raise MstException("Can't find %s column in header: %s" % (column, header) )
+
     def __str__(self):
         return "%s: header: %s, data: %s rows, languages: %s" % (self.__class__.__name__, self.header, len(self.data), self.languages)
     
@@ -101,31 +128,12 @@ class Spreadsheet(object):
         """
         Parse data header and extract columns indexes for type, id and languages.
         """
-        # find index of type column
-        if self.TYPE in self.header:
-            self.__type_column = self.header.index( self.TYPE )
-        else:
-            raise MstException("Can't fine %s column in header: %s" % (self.TYPE, self.header) )
-        
-        # find index of resource id column
-        if self.__resource_column_name in self.header:
-            self.__id_column = self.header.index( self.__resource_column_name )
-        else:
-            raise MstException("Can't find %s column in header: %s" % (self.__resource_column_name, self.header) )
-        
-        # find indexes of all language columns
+        self.validate_header( self.header, self.required_columns(self.__resource_column_name, self.__languages) )
+        self.__type_column = self.header.index( self.TYPE )
+        self.__id_column = self.header.index( self.__resource_column_name )
         for language in self.__languages:
-            if language in self.header:
-                col = self.header.index( language )
-                self.__language_column[language] = col
-            else:
-                raise MstException("Can't find %s column in header: %s" % (language, self.header) )
-            
-        # find index of options column
-        if Spreadsheet.OPTIONS in self.header:
-            self.__options_column = self.header.index( Spreadsheet.OPTIONS )
-        else:
-            raise MstException("Can't find %s column in header: %s" % (Spreadsheet.OPTIONS, self.header) )
+            self.__language_column[language] = self.header.index( language )
+        self.__options_column = self.header.index( self.OPTIONS )
    
     def _get_row_type(self, row):
         """"Extract type data of a given row"""
@@ -158,20 +166,71 @@ class Spreadsheet(object):
         #FIX: more checks here
         return len( row[ self.id_column ] ) > 0;
     
-    def __get_string(self, row):
+    def __parse_resources(self, rows=None):
         """
-        Get string resource from a given row. It loads resource
-        object with translations for all languages and returns
-        complete String instance.
+        Walk through the data section once and build all resources
+        in a single sweep. Each row is classified by its type column
+        and dispatched to a proper handler. Results are cached, so
+        subsequent calls to getters do not scan the data again.
+
+        rows -- iterable with data rows; data section is used by default
         """
-        key = row[ self.id_column ]
-        resource = String(key, self.languages);
+        if self.__strings is not None:
+            return
+        self.__strings = []
+        self.__string_arrays = {}
+        self.__quantity_strings = {}
+        handlers = {
+            self.TYPE_STRING: self.__add_string,
+            self.TYPE_STRING_ARRAY: self.__add_string_array,
+            self.TYPE_QUANTITY_STRING: self.__add_quantity_string
+        }
+        type_column = self.type_column
+        for row in (self.data if rows is None else rows):
+            handler = handlers.get( row[ type_column ] )
+            if handler is not None and self._has_valid_key(row):
+                handler(row)
+
+    def __row_texts(self, row):
+        """
+        Yield (language, ResourceText) tuples for a given row. Options
+        are parsed once per row and shared by all translations.
+        """
+        options = self._get_row_options(row)
         for lang in self.languages:
             col = self.language_column(lang)
-            text = row[ col ]
-            options = self._get_row_options(row)
-            resource.add(lang, ResourceText(text, options) )
-        return resource
+            yield lang, ResourceText(row[ col ], options)
+
+    def __add_string(self, row):
+        """
+        Create String resource from a given row. It loads resource
+        object with translations for all languages.
+        """
+        key = row[ self.id_column ]
+        resource = String(key, self.languages)
+        for lang, text in self.__row_texts(row):
+            resource.add(lang, text)
+        self.__strings.append(resource)
+
+    def __add_string_array(self, row):
+        """Add string array item from a given row to a proper StringArray"""
+        key, index = row[ self.id_column ].split(':')
+        resource = self.__string_arrays.get(key)
+        if resource is None:
+            resource = StringArray(key, self.languages)
+            self.__string_arrays[key] = resource
+        for lang, text in self.__row_texts(row):
+            resource.add(lang, int(index), text) #fixme: conversion not necessary
+
+    def __add_quantity_string(self, row):
+        """Add quantity string from a given row to a proper QuantityStrings"""
+        key, quantity = row[ self.id_column ].split(':')
+        resource = self.__quantity_strings.get(key)
+        if resource is None:
+            resource = QuantityStrings(key, self.languages)
+            self.__quantity_strings[key] = resource
+        for lang, text in self.__row_texts(row):
+            resource.add_quantity_string(lang, quantity, text)
 
     @property
     def type_column(self):
@@ -209,47 +268,18 @@ class Spreadsheet(object):
 
     def get_strings(self):
         """Collect all String resources and return a list"""
-        resources = []
-        for row in self.data:
-            if( self._get_row_type(row) == self.TYPE_STRING and self._has_valid_key(row) ):
-                resource = self.__get_string(row)
-                resources.append(resource)
-        return resources
+        self.__parse_resources()
+        return list( self.__strings )
     
     def get_string_arrays(self):
         """Collect all StringArray resources and return a list"""
-        resources = {}
-        for row in self.data:
-            if( self._get_row_type(row) == self.TYPE_STRING_ARRAY and self._has_valid_key(row) ):
-                key_with_index = row[ self.id_column ]
-                key, index = key_with_index.split(':')
-                if (key in resources) == False:
-                    resources[key] = StringArray(key, self.languages);
-                sa = resources[key]
-                for lang in self.languages:
-                    col = self.language_column( lang )
-                    text = row[ col ]
-                    options = self._get_row_options(row)
-                    sa.add(lang, int(index), ResourceText(text, options) ) #fixme: conversion not necessary
-        return list( resources.values() )
-        
+        self.__parse_resources()
+        return list( self.__string_arrays.values() )
 
     def get_quantity_strings(self):
         """Collect all QuantityStrings resources and return a list"""
-        resources = {}
-        for row in self.data:
-            if( self._get_row_type(row) == self.TYPE_QUANTITY_STRING and self._has_valid_key(row) ):
-                key_with_quantity = row[ self.id_column ]
-                key, quantity = key_with_quantity.split(':')
-                if (key in resources) == False:
-                    resources[key] = QuantityStrings(key, self.languages);
-                qs = resources[key]
-                for lang in self.languages:
-                    col = self.language_column( lang )
-                    text = row[ col ]
-                    options = self._get_row_options(row)
-                    qs.add_quantity_string(lang, quantity, ResourceText(text, options) )
-        return sorted( resources.values() )
+        self.__parse_resources()
+        return sorted( self.__quantity_strings.values() )
     
     def get_all_resources(self):
         resources = []
@@ -257,5 +287,3 @@ class Spreadsheet(object):
         resources.extend( self.get_string_arrays() )
         resources.extend( self.get_quantity_strings() )
         return resources
-
-        
\ No newline at end of file
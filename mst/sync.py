@@ -0,0 +1,143 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+from mst.exceptions import MstException
+from mst.resources import String, StringArray, QuantityStrings
+from mst.spreadsheet import Spreadsheet
+
+class WorksheetSync(object):
+    """
+    Writes resources back to a Google worksheet. Resources are compared
+    with current worksheet data and only changed cells are sent, in
+    batches of chunk_size cells posted by up to workers threads.
+
+    Resource keys missing in the worksheet are appended as new rows.
+    Empty translations never overwrite existing texts.
+    """
+
+    def __init__(self, worksheet, resource_column, languages, chunk_size=500, workers=4):
+        self.__worksheet = worksheet
+        self.__resource_column = resource_column
+        self.__languages = languages
+        self.__chunk_size = chunk_size
+        self.__workers = workers
+
+    def __str__(self):
+        return "%s: worksheet: %s, column: %s, languages: %s" % (self.__class__.__name__, self.worksheet.title, self.resource_column, self.languages)
+
+    @property
+    def worksheet(self):
+        return self.__worksheet
+
+    @property
+    def resource_column(self):
+        return self.__resource_column
+
+    @property
+    def languages(self):
+        return self.__languages
+
+    @property
+    def chunk_size(self):
+        return self.__chunk_size
+
+    @property
+    def workers(self):
+        return self.__workers
+
+    def diff(self, resources, matrix=None):
+        """
+        Return a list of (row, col, value) tuples of cells that differ
+        from given resources. Rows and columns are numbered from 1.
+
+        matrix -- current worksheet data with a header row; it is
+                  downloaded if not given
+        """
+        if matrix is None:
+            matrix = self.worksheet.get_all_values()
+        if len( matrix ) == 0:
+            raise MstException("Can't sync resources to worksheet without header")
+        header = Spreadsheet(self.resource_column, matrix[:1], self.languages)
+
+        rows = {}
+        for number, row in enumerate(matrix[1:], start=2):
+            key = _cell(row, header.id_column)
+            if key:
+                rows.setdefault(key, number)
+
+        changes = []
+        next_row = len( matrix ) + 1
+        for row_type, key, texts in self.__rows(resources):
+            number = rows.get(key)
+            if number is None:
+                if not any( texts.values() ):
+                    continue
+                number = rows[key] = next_row
+                next_row += 1
+                current = []
+                changes.append( (number, header.type_column + 1, row_type) )
+                changes.append( (number, header.id_column + 1, key) )
+            else:
+                current = matrix[number - 1]
+            for lang, text in texts.items():
+                col = header.language_column(lang)
+                if text and text != _cell(current, col):
+                    changes.append( (number, col + 1, text) )
+        return changes
+
+    def sync(self, resources, matrix=None):
+        """
+        Write changed cells of given resources to the worksheet. The
+        worksheet is resized once if new rows do not fit. Return number
+        of written cells.
+        """
+        changes = self.diff(resources, matrix)
+        if len( changes ) == 0:
+            return 0
+        last_row = max( row for row, col, value in changes )
+        if last_row > self.worksheet.row_count:
+            self.worksheet.resize(rows=last_row)
+        return self.worksheet.update_values(changes, self.chunk_size, self.workers)
+
+    def __rows(self, resources):
+        """
+        Yield (type, key, texts) tuples of worksheet rows representing
+        given resources. Texts is a dictionary of synced languages.
+        """
+        for resource in resources:
+            languages = [lang for lang in self.languages if lang in resource.languages]
+            if isinstance(resource, String):
+                yield Spreadsheet.TYPE_STRING, resource.key, { lang: resource.get(lang) for lang in languages }
+            elif isinstance(resource, StringArray):
+                indexes = set()
+                for lang in languages:
+                    indexes.update( resource.array(lang).keys() )
+                for index in sorted(indexes):
+                    texts = { lang: resource.array(lang).get(index, '') for lang in languages }
+                    yield Spreadsheet.TYPE_STRING_ARRAY, '%s:%d' % (resource.key, index), texts
+            elif isinstance(resource, QuantityStrings):
+                for quantity in QuantityStrings.QUANTITIES:
+                    texts = { lang: resource.get_quantities(lang)[quantity] for lang in languages }
+                    yield Spreadsheet.TYPE_QUANTITY_STRING, '%s:%s' % (resource.key, quantity), texts
+            else:
+                raise MstException("Can't sync resource: %s" % resource)
+
+def _cell(row, col):
+    """Cell value of a given row or empty string if the cell is missing"""
+    if col < len( row ):
+        return row[col] or ''
+    return ''
@@ -0,0 +1,125 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+Local asyncio HTTP/1.1 server used in tests of the asyncio gspread
+client. Like httpstub.StubServer it serves bodies registered per path,
+possibly computed from query parameters, can delay responses, send
+them in chunks and keeps track of requests served at once.
+"""
+
+import asyncio
+import gzip
+try:
+    from urllib.parse import parse_qsl
+except ImportError:
+    from urlparse import parse_qsl
+
+class AsyncStubServer(object):
+    """
+    HTTP server on a free local port, running in the current event loop.
+    Use as an asynchronous context manager.
+    """
+
+    def __init__(self):
+        self.bodies = {}
+        self.requests = []
+        self.latency = 0
+        self.encodings = ()
+        self.chunk_size = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.connections = 0
+        self.__server = None
+
+    async def __aenter__(self):
+        self.__server = await asyncio.start_server(self.__serve, '127.0.0.1', 0)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.__server.close()
+        await self.__server.wait_closed()
+
+    @property
+    def port(self):
+        return self.__server.sockets[0].getsockname()[1]
+
+    def url(self, path):
+        return 'http://127.0.0.1:%d%s' % (self.port, path)
+
+    async def __serve(self, reader, writer):
+        self.connections += 1
+        try:
+            while await self.__respond(reader, writer):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def __respond(self, reader, writer):
+        request = await reader.readline()
+        if not request:
+            return False
+        method, target, version = request.decode('latin-1').split()
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1')
+            if line in ('\r\n', '\n', ''):
+                break
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0))
+        body = await reader.readexactly(length) if length else b''
+        self.requests.append((method, target, headers, body))
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+
+        path, _, query = target.partition('?')
+        content = self.bodies.get(path)
+        status = '200 OK'
+        extra = ''
+        if content is None:
+            status, content = '404 Not Found', b''
+        elif callable(content):
+            content = content(dict(parse_qsl(query)))
+        if content and 'gzip' in self.encodings and 'gzip' in headers.get('accept-encoding', ''):
+            content = gzip.compress(content)
+            extra = 'Content-Encoding: gzip\r\n'
+
+        if not self.chunk_size:
+            writer.write(('HTTP/1.1 %s\r\nContent-Type: application/atom+xml\r\n'
+                          'Content-Length: %d\r\n%s\r\n' % (status, len(content), extra)).encode('latin-1') + content)
+            await writer.drain()
+            return True
+
+        writer.write(('HTTP/1.1 %s\r\nContent-Type: application/atom+xml\r\n'
+                      'Transfer-Encoding: chunked\r\n%s\r\n' % (status, extra)).encode('latin-1'))
+        for i in range(0, len(content), self.chunk_size):
+            chunk = content[i:i + self.chunk_size]
+            writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            await writer.drain()
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+        return True
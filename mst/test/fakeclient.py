@@ -0,0 +1,91 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+Fake gspread client serving feeds generated from a matrix of strings,
+used by tests of worksheets and Google loader.
+"""
+
+import io
+from xml.etree import ElementTree
+from mst.gspread.models import Spreadsheet, Worksheet
+from mst.gspread.ns import _ns1
+from mst.gspread.utils import iter_cells
+from mst.test import feeds
+
+class FakeClient(object):
+    """
+    Client serving cells feeds generated from a matrix. Parameters of
+    each cells feed request are recorded, and so are names of all
+    methods sending a request.
+    """
+
+    def __init__(self, matrix, updated='2014-01-01T00:00:00.000Z'):
+        self.matrix = matrix
+        self.updated = updated
+        self.requests = []
+        self.calls = []
+        self.rows = len(matrix)
+        self.cols = max(len(row) for row in matrix)
+
+    def get_feed(self, url):
+        self.calls.append('get_feed')
+        return feeds.worksheet_entry('strings', self.rows, self.cols, self.updated)
+
+    def put_feed(self, url, data):
+        self.calls.append('put_feed')
+        entry = ElementTree.fromstring(data)
+        self.rows = int( entry.find(_ns1('rowCount')).text )
+        self.cols = int( entry.find(_ns1('colCount')).text )
+        return entry
+
+    def post_cells(self, worksheet, data):
+        self.calls.append('post_cells')
+        for row, col, value in feeds.batch_cells(data):
+            while len(self.matrix) < row:
+                self.matrix.append([])
+            cells = self.matrix[row - 1]
+            cells.extend([''] * (col - len(cells)))
+            cells[col - 1] = value
+        return ElementTree.Element('feed')
+
+    def open(self, title):
+        entry = ElementTree.fromstring( feeds.spreadsheets_feed([title]) )[0]
+        return Spreadsheet(self, entry)
+
+    def get_worksheets_feed(self, spreadsheet, visibility='private', projection='full'):
+        cols = max(len(row) for row in self.matrix)
+        feed = ElementTree.Element('feed')
+        feed.append( feeds.worksheet_entry('strings', len(self.matrix), cols, self.updated) )
+        return feed
+
+    def get_cells_feed(self, worksheet, visibility='private', projection='full', params=None):
+        self.calls.append('get_cells_feed')
+        self.requests.append(params)
+        return ElementTree.fromstring( feeds.cells_feed(self.matrix, params) )
+
+    def iter_cells_feed(self, worksheet, visibility='private', projection='full', params=None):
+        self.requests.append(params)
+        return iter_cells( io.BytesIO( feeds.cells_feed(self.matrix, params) ) )
+
+def fake_worksheet(matrix):
+    client = FakeClient(matrix)
+    entry = ElementTree.fromstring( feeds.spreadsheets_feed(['reference']) )[0]
+    spreadsheet = Spreadsheet(client, entry)
+    cols = max(len(row) for row in matrix)
+    return Worksheet(spreadsheet, feeds.worksheet_entry('strings', len(matrix), cols))
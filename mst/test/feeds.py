@@ -0,0 +1,145 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+Fake Google Spreadsheets API feeds used in tests of gspread models and
+loaders. Feeds are generated from a plain matrix of strings, so tests
+can run without network access.
+"""
+
+import csv
+from xml.etree import ElementTree
+from xml.etree.ElementTree import Element, SubElement, tostring
+from mst.gspread.ns import ATOM_NS, SPREADSHEET_NS
+from mst.gspread.urls import construct_url
+
+SPREADSHEET_KEY = 'refkey'
+WORKSHEET_ID = 'od6'
+
+def _atom(tag):
+    return '{%s}%s' % (ATOM_NS, tag)
+
+def _gs(tag):
+    return '{%s}%s' % (SPREADSHEET_NS, tag)
+
+def _link(parent, rel, href):
+    SubElement(parent, _atom('link'), {'rel': rel, 'type': 'application/atom+xml', 'href': href})
+
+def _label(row, col):
+    label = ''
+    while col:
+        col, mod = divmod(col - 1, 26)
+        label = chr(ord('A') + mod) + label
+    return '%s%s' % (label, row)
+
+def spreadsheets_feed(titles):
+    """Spreadsheets feed with one entry per title; keys are derived from index"""
+    feed = Element(_atom('feed'))
+    for i, title in enumerate(titles):
+        key = SPREADSHEET_KEY if i == 0 else '%s%d' % (SPREADSHEET_KEY, i)
+        entry = SubElement(feed, _atom('entry'))
+        SubElement(entry, _atom('id')).text = construct_url('spreadsheets') + '/' + key
+        SubElement(entry, _atom('title')).text = title
+        _link(entry, 'alternate', 'https://docs.google.com/spreadsheet/ccc?key=%s' % key)
+    return tostring(feed)
+
+def worksheet_entry(title, rows, cols, updated='2014-01-01T00:00:00.000Z', worksheet_id=WORKSHEET_ID, key=SPREADSHEET_KEY, parent=None):
+    """Worksheet entry element, as returned in worksheets feed"""
+    tag = _atom('entry')
+    entry = Element(tag) if parent is None else SubElement(parent, tag)
+    url = construct_url('worksheets', spreadsheet_id=key) + '/' + worksheet_id
+    SubElement(entry, _atom('id')).text = url
+    SubElement(entry, _atom('updated')).text = updated
+    SubElement(entry, _atom('title')).text = title
+    _link(entry, 'self', url)
+    _link(entry, 'edit', url + '/version1')
+    SubElement(entry, _gs('rowCount')).text = str(rows)
+    SubElement(entry, _gs('colCount')).text = str(cols)
+    return entry
+
+def worksheets_feed(worksheets, key=SPREADSHEET_KEY):
+    """Worksheets feed; worksheets is a list of (title, rows, cols) tuples"""
+    feed = Element(_atom('feed'))
+    for i, (title, rows, cols) in enumerate(worksheets):
+        worksheet_id = WORKSHEET_ID if i == 0 else 'od%d' % (i + 6)
+        worksheet_entry(title, rows, cols, worksheet_id=worksheet_id, key=key, parent=feed)
+    return tostring(feed)
+
+def cell_entry(row, col, value, key=SPREADSHEET_KEY, worksheet_id=WORKSHEET_ID, parent=None):
+    """Single cell entry element"""
+    tag = _atom('entry')
+    entry = Element(tag) if parent is None else SubElement(parent, tag)
+    url = construct_url('cells', spreadsheet_id=key, worksheet_id=worksheet_id) + '/R%sC%s' % (row, col)
+    SubElement(entry, _atom('id')).text = url
+    SubElement(entry, _atom('title')).text = _label(row, col)
+    _link(entry, 'self', url)
+    _link(entry, 'edit', url + '/1')
+    cell = SubElement(entry, _gs('cell'), {'row': str(row), 'col': str(col), 'inputValue': value})
+    cell.text = value
+    return entry
+
+def cells_feed(matrix, params=None, key=SPREADSHEET_KEY, worksheet_id=WORKSHEET_ID):
+    """
+    Cells feed for a given matrix of strings. It honours min-row, max-row,
+    min-col, max-col, range and return-empty feed parameters. Empty cells
+    are skipped unless return-empty is requested.
+    """
+    params = params or {}
+    rows = len(matrix)
+    cols = max([len(row) for row in matrix] or [0])
+    min_row = int(params.get('min-row', 1))
+    max_row = int(params.get('max-row', rows))
+    min_col = int(params.get('min-col', 1))
+    max_col = int(params.get('max-col', cols))
+    if 'range' in params:
+        first, last = params['range'].split(':')
+        min_row, min_col = parse_label(first)
+        max_row, max_col = parse_label(last)
+    return_empty = params.get('return-empty') == 'true'
+
+    feed = Element(_atom('feed'))
+    for r in range(min_row, max_row + 1):
+        for c in range(min_col, max_col + 1):
+            value = ''
+            if r <= rows and c <= len(matrix[r - 1]):
+                value = matrix[r - 1][c - 1]
+            if value or return_empty:
+                cell_entry(r, c, value, key, worksheet_id, parent=feed)
+    return tostring(feed)
+
+def parse_label(label):
+    """Translate 'B3' label to (row, col) tuple"""
+    letters = label.rstrip('0123456789')
+    col = 0
+    for c in letters.upper():
+        col = col * 26 + ord(c) - ord('A') + 1
+    return int(label[len(letters):]), col
+
+def matrix_from_csv(path):
+    """Load matrix of strings from CSV file"""
+    with open(path, 'r') as f:
+        return [row for row in csv.reader(f)]
+
+def batch_cells(body):
+    """Extract (row, col, value) tuples from a cells batch feed"""
+    feed = ElementTree.fromstring(body)
+    result = []
+    for entry in feed.findall(_atom('entry')):
+        cell = entry.find(_gs('cell'))
+        result.append( (int(cell.get('row')), int(cell.get('col')), cell.get('inputValue')) )
+    return result
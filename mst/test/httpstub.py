@@ -0,0 +1,202 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""
+Local HTTP server used in tests of the gspread transport. It serves
+bodies registered per path, answers conditional requests and records
+every request it receives. A body may also be a function of the query
+parameters, and every response may be delayed to simulate latency.
+"""
+
+import gzip
+import hashlib
+import threading
+import time
+import zlib
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qsl
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import parse_qsl
+
+LAST_MODIFIED = 'Wed, 01 Jan 2014 00:00:00 GMT'
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.stub.connected()
+
+    def __respond(self):
+        stub = self.server.stub
+        stub.begin()
+        try:
+            if stub.latency:
+                time.sleep(stub.latency)
+            self.__dispatch(stub)
+        finally:
+            stub.end()
+
+    def __dispatch(self, stub):
+        length = int( self.headers.get('Content-Length') or 0 )
+        body = self.rfile.read(length) if length else b''
+        stub.record(self.command, self.path, dict(self.headers.items()), body)
+
+        path, _, query = self.path.partition('?')
+        if stub.drop_connections:
+            # Close without announcing it, like a server dropping idle keep-alive connections
+            self.close_connection = True
+
+        if path in stub.redirects:
+            self.send_response(stub.redirect_code)
+            self.send_header('Location', stub.redirects[path])
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        if path not in stub.bodies:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        content = stub.bodies[path]
+        if callable(content):
+            content = content(dict(parse_qsl(query)))
+        headers = {}
+        if stub.etags:
+            headers['ETag'] = '"%s"' % hashlib.sha1(content).hexdigest()
+        if stub.last_modified:
+            headers['Last-Modified'] = LAST_MODIFIED
+
+        if self.command == 'GET' and headers and self.__not_modified(headers):
+            self.send_response(304)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+
+        accepted = [e.strip() for e in self.headers.get('Accept-Encoding', '').split(',')]
+        encoding = next((e for e in stub.encodings if e in accepted), None)
+        if encoding == 'gzip':
+            content = gzip.compress(content)
+        elif encoding == 'deflate':
+            content = zlib.compress(content)
+        if encoding:
+            headers['Content-Encoding'] = encoding
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/atom+xml')
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+        stub.sent += len(content)
+
+    def __not_modified(self, headers):
+        if 'ETag' in headers and self.headers.get('If-None-Match') == headers['ETag']:
+            return True
+        if 'Last-Modified' in headers and self.headers.get('If-Modified-Since') == headers['Last-Modified']:
+            return True
+        return False
+
+    do_GET = __respond
+    do_POST = __respond
+    do_PUT = __respond
+    do_DELETE = __respond
+
+class StubServer(object):
+    """
+    HTTP server listening on a free local port in a background thread.
+    Use as a context manager or call close() when done.
+    """
+
+    def __init__(self, etags=True, last_modified=False):
+        self.bodies = {}
+        self.redirects = {}
+        self.redirect_code = 302
+        self.requests = []
+        self.drop_connections = False
+        self.latency = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.encodings = ()
+        self.sent = 0
+        self.__connections = 0
+        self.etags = etags
+        self.last_modified = last_modified
+        self.__lock = threading.Lock()
+        self.__server = _Server(('127.0.0.1', 0), _Handler)
+        self.__server.stub = self
+        self.__thread = threading.Thread(target=self.__server.serve_forever, args=(0.05,))
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    @property
+    def port(self):
+        return self.__server.server_address[1]
+
+    def url(self, path):
+        return 'http://127.0.0.1:%d%s' % (self.port, path)
+
+    def record(self, method, path, headers, body):
+        with self.__lock:
+            self.requests.append((method, path, headers, body))
+
+    def begin(self):
+        with self.__lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def end(self):
+        with self.__lock:
+            self.in_flight -= 1
+
+    def connected(self):
+        with self.__lock:
+            self.__connections += 1
+
+    @property
+    def connections(self):
+        """Number of distinct client connections seen so far"""
+        with self.__lock:
+            return self.__connections
+
+    def close(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+        self.__thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,203 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+import asyncio
+import unittest
+from unittest import mock
+from mst.gspread import aioclient
+from mst.gspread.aioclient import AsyncClient, HTTPError
+from mst.gspread.exceptions import SpreadsheetNotFound, WorksheetNotFound
+from mst.test import feeds
+from mst.test.aiostub import AsyncStubServer
+from mst.test.reference import Spreadsheet as reference
+
+class StaleConnection(object):
+    """Idle keep-alive connection the server has closed. Writing to it
+    fails with `write_error`, reading gives end of stream."""
+
+    def __init__(self, write_error=None):
+        self.write_error = write_error
+        self.closed = False
+
+    def at_eof(self):
+        return False
+
+    async def readline(self):
+        return b''
+
+    def write(self, data):
+        pass
+
+    async def drain(self):
+        if self.write_error:
+            raise self.write_error
+
+    def close(self):
+        self.closed = True
+
+
+class TestAsyncClient(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.matrix = feeds.matrix_from_csv(reference.csv_file)
+        self.other = [['type', 'android_id'], ['string', 'other']]
+        self.server = await AsyncStubServer().__aenter__()
+        self.patches = [mock.patch('mst.gspread.urls.SPREADSHEETS_FEED_URL', self.server.url('/feeds/')),
+                        mock.patch('mst.gspread.aioclient.AUTH_SERVER', self.server.url(''))]
+        for patch in self.patches:
+            patch.start()
+        self.serve('reference', 'refkey', self.matrix)
+        self.serve('other', 'refkey1', self.other)
+        self.server.bodies['/feeds/spreadsheets/private/full'] = lambda params: feeds.spreadsheets_feed(['reference', 'other'])
+        self.server.bodies['/accounts/ClientLogin'] = b'SID=sid\nAuth=token\n'
+        self.client = AsyncClient(('user', 'password'))
+        await self.client.login()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        for patch in self.patches:
+            patch.stop()
+        await self.server.__aexit__()
+
+    def serve(self, title, key, matrix):
+        cols = max(len(row) for row in matrix)
+        self.server.bodies['/feeds/worksheets/%s/private/full' % key] = \
+            lambda params: feeds.worksheets_feed([('strings', len(matrix), cols)], key=key)
+        self.server.bodies['/feeds/cells/%s/%s/private/full' % (key, feeds.WORKSHEET_ID)] = \
+            lambda params: feeds.cells_feed(matrix, params, key=key)
+
+    async def values(self, title):
+        spreadsheet = await self.client.open(title)
+        worksheet = await spreadsheet.worksheet('strings')
+        return await worksheet.get_all_values()
+
+    async def testLoginSetsAuthorization(self):
+        method, target, headers, body = self.server.requests[0]
+        self.assertEqual( (method, target), ('POST', '/accounts/ClientLogin') )
+        self.assertIn( b'Email=user', body )
+        await self.client.open('reference')
+        self.assertEqual( self.server.requests[1][2]['authorization'], 'GoogleLogin auth=token' )
+
+    async def testGetAllValues(self):
+        self.assertEqual( await self.values('reference'), self.matrix )
+
+    async def testSpreadsheetsAreDownloadedConcurrently(self):
+        self.server.latency = 0.05
+        values = await asyncio.gather(self.values('reference'), self.values('other'))
+        self.assertEqual( values, [self.matrix, self.other] )
+        self.assertEqual( self.server.max_in_flight, 2 )
+
+    async def testConnectionsAreReused(self):
+        await self.values('reference')
+        await self.values('other')
+        self.assertEqual( self.server.connections, 1 )
+
+    async def testCompressedFeedsAreDecompressed(self):
+        self.server.encodings = ('gzip',)
+        self.assertEqual( await self.values('reference'), self.matrix )
+        self.assertEqual( self.server.requests[-1][2]['accept-encoding'], 'gzip, deflate' )
+
+    async def testOpenByKey(self):
+        spreadsheet = await self.client.open_by_key('refkey1')
+        self.assertEqual( spreadsheet.id, 'refkey1' )
+        with self.assertRaises(SpreadsheetNotFound):
+            await self.client.open_by_key('missing')
+
+    async def testMissingWorksheet(self):
+        spreadsheet = await self.client.open('reference')
+        with self.assertRaises(WorksheetNotFound):
+            await spreadsheet.worksheet('missing')
+
+    async def testErrorStatusRaisesHTTPError(self):
+        with self.assertRaises(HTTPError) as error:
+            await self.client.session.get( self.server.url('/missing') )
+        self.assertEqual( error.exception.code, 404 )
+
+    async def testInformationalStatusRaisesHTTPError(self):
+        async def respond(reader, writer):
+            await reader.readline()
+            writer.write(b'HTTP/1.1 100 Continue\r\nContent-Length: 0\r\n\r\n')
+            writer.close()
+        server = await asyncio.start_server(respond, '127.0.0.1', 0)
+        try:
+            with self.assertRaises(HTTPError) as error:
+                await self.client.session.get( 'http://127.0.0.1:%d/feed' % server.sockets[0].getsockname()[1] )
+            self.assertEqual( error.exception.code, 100 )
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    async def testSpreadsheetKeepsItsOwnWorksheets(self):
+        spreadsheet = await self.client.open('reference')
+        worksheet = await spreadsheet.worksheet('strings')
+        self.assertIs( await spreadsheet.get_worksheet(0), worksheet )
+        self.assertEqual( spreadsheet._spreadsheet._sheet_list, [] )
+
+    async def testOpenReturnsFirstSpreadsheetWithTitle(self):
+        self.server.bodies['/feeds/spreadsheets/private/full'] = lambda params: feeds.spreadsheets_feed(['reference', 'reference'])
+        spreadsheet = await self.client.open('reference')
+        self.assertEqual( spreadsheet.id, 'refkey' )
+
+    def stale(self, write_error=None):
+        connection = StaleConnection(write_error)
+        key = ('http', '127.0.0.1', self.server.port)
+        self.client.session._idle[key] = [(connection, connection)]
+        return connection
+
+    async def testSafeMethodIsRetriedOnStaleConnection(self):
+        connection = self.stale()
+        await self.client.open('reference')
+        self.assertTrue( connection.closed )
+
+    async def testUnsentRequestIsRetried(self):
+        self.stale( BrokenPipeError() )
+        r = await self.client.session.post( self.server.url('/accounts/ClientLogin'), {'Email': 'user'} )
+        self.assertEqual( r.getcode(), 200 )
+
+    async def testPostIsNotSentTwice(self):
+        requests = len(self.server.requests)
+        connection = self.stale()
+        with self.assertRaises(asyncio.IncompleteReadError):
+            await self.client.session.post( self.server.url('/accounts/ClientLogin'), {'Email': 'user'} )
+        self.assertTrue( connection.closed )
+        self.assertEqual( len(self.server.requests), requests )
+
+    async def testCellsFeedIsParsedWhileDownloaded(self):
+        self.server.chunk_size = 1024
+        feed = feeds.cells_feed(self.matrix)
+        with mock.patch.object(aioclient._CellsParser, 'feed', autospec=True,
+                               side_effect=aioclient._CellsParser.feed) as parse:
+            self.assertEqual( await self.values('reference'), self.matrix )
+        sizes = [len(call[0][1]) for call in parse.call_args_list]
+        self.assertGreater( len(sizes), 1 )
+        self.assertLess( max(sizes), len(feed) )
+        self.server.encodings = ('gzip',)
+        self.assertEqual( await self.values('other'), self.other )
+        self.assertEqual( self.server.connections, 1 )
+
+    async def testOnlyAsyncMethodsAreOffered(self):
+        spreadsheet = await self.client.open('reference')
+        worksheet = await spreadsheet.get_worksheet(0)
+        self.assertEqual( (await spreadsheet.worksheets())[0], worksheet )
+        self.assertEqual( worksheet.title, 'strings' )
+        self.assertIsNone( await spreadsheet.get_worksheet(5) )
+        for name in ('sheet1', 'add_worksheet', 'del_worksheet'):
+            self.assertFalse( hasattr(spreadsheet, name), name )
+        for name in ('cell', 'acell', 'range', 'row_values', 'col_values', 'find', 'findall',
+                     'update_cell', 'update_cells', 'append_rows', 'resize'):
+            self.assertFalse( hasattr(worksheet, name), name )
@@ -0,0 +1,152 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from mst import Config, Factory, Spreadsheet
+from mst.builder import Builder
+from mst.resources import String, ResourceText
+from mst.test.reference import Spreadsheet as reference, AndroidConfig
+
+def create_project(generator):
+    """Create temporary project root with configuration file"""
+    root = tempfile.mkdtemp()
+    with open(os.path.join(root, 'mst.cfg'), 'w') as f:
+        json.dump({'generator': generator, 'paths': AndroidConfig.paths}, f)
+    return Config(root)
+
+def create_generator(config):
+    sheet = Spreadsheet('android_id', reference.csv_file, config.languages)
+    generator = Factory.create_generator(config.generator)
+    generator.add_resources( sheet.get_all_resources() )
+    return generator
+
+def read_files(config):
+    files = {}
+    for language in config.languages:
+        with open(config.resource_file_path(language), 'rb') as f:
+            files[language] = f.read()
+    return files
+
+class TestBuilder(unittest.TestCase):
+
+    GENERATORS = [Factory.GENERATOR_ANDROID, Factory.GENERATOR_ANDROID_XML, Factory.GENERATOR_IOS]
+
+    def setUp(self):
+        self.roots = []
+
+    def tearDown(self):
+        for root in self.roots:
+            shutil.rmtree(root)
+
+    def build(self, generator_type, jobs):
+        config = create_project(generator_type)
+        self.roots.append(config.root)
+        built = []
+        Builder(config, create_generator(config), jobs).build(callback=lambda l, p: built.append(l))
+        self.assertEqual( sorted(built), sorted(config.languages) )
+        return read_files(config)
+
+    def testParallelOutputIsIdenticalToSerial(self):
+        for generator_type in self.GENERATORS:
+            serial = self.build(generator_type, 1)
+            parallel = self.build(generator_type, 3)
+            self.assertEqual( serial, parallel, generator_type )
+
+    def testSelectedLanguagesAreBuilt(self):
+        config = create_project(Factory.GENERATOR_ANDROID)
+        self.roots.append(config.root)
+        built = Builder(config, create_generator(config), 2).build(['fr'])
+        self.assertEqual( built, ['fr'] )
+        self.assertTrue( os.path.isfile( config.resource_file_path('fr') ) )
+        self.assertFalse( os.path.exists( config.resource_file_path('en') ) )
+
+class TestStreamingGenerators(unittest.TestCase):
+
+    def testStreamedOutputIsIdenticalToRendered(self):
+        for generator_type in TestBuilder.GENERATORS:
+            config = create_project(generator_type)
+            shutil.rmtree(config.root)
+            generator = create_generator(config)
+            for sorted_output in (False, True):
+                generator.sorted = sorted_output
+                for language in config.languages:
+                    stream = io.StringIO()
+                    generator.generate(language, stream)
+                    self.assertEqual( stream.getvalue(), generator.render(language), generator_type )
+
+    def testEmptyXmlDocumentIsStreamed(self):
+        generator = Factory.create_generator(Factory.GENERATOR_ANDROID_XML)
+        stream = io.StringIO()
+        generator.generate('en', stream)
+        self.assertEqual( stream.getvalue(), generator.render('en') )
+
+class TestIncrementalBuilder(unittest.TestCase):
+
+    def setUp(self):
+        self.config = create_project(Factory.GENERATOR_ANDROID)
+
+    def tearDown(self):
+        shutil.rmtree(self.config.root)
+
+    def build(self, generator):
+        return Builder(self.config, generator, incremental=True).build()
+
+    def testUnchangedLanguagesAreSkipped(self):
+        generator = create_generator(self.config)
+        self.assertEqual( sorted( self.build(generator) ), sorted(self.config.languages) )
+        self.assertTrue( os.path.isfile(self.config.state_file_path) )
+        self.assertEqual( self.build( create_generator(self.config) ), [] )
+
+    def testChangedLanguageIsRebuilt(self):
+        self.build( create_generator(self.config) )
+        generator = create_generator(self.config)
+        string = String('new_key', self.config.languages)
+        string.add('fr', 'nouveau')
+        generator.add_resources([string])
+        # only French text is not empty, but key is part of every language input
+        self.assertEqual( sorted( self.build(generator) ), sorted(self.config.languages) )
+        self.assertEqual( self.build(generator), [] )
+
+    def testOptionsArePartOfFingerprint(self):
+        generator = create_generator(self.config)
+        fingerprint = generator.fingerprint('en')
+        string = String('key', ['en'])
+        string.add('en', ResourceText('text', ['a']))
+        other = String('key', ['en'])
+        other.add('en', ResourceText('text', ['b']))
+        first, second = create_generator(self.config), create_generator(self.config)
+        first.add_resources([string])
+        second.add_resources([other])
+        self.assertNotEqual( first.fingerprint('en'), second.fingerprint('en') )
+        self.assertNotEqual( first.fingerprint('en'), fingerprint )
+
+    def testToolVersionIsPartOfFingerprint(self):
+        fingerprint = create_generator(self.config).fingerprint('en')
+        with mock.patch('mst.const.version', 'upgraded'):
+            self.assertNotEqual( create_generator(self.config).fingerprint('en'), fingerprint )
+
+    def testMissingOutputIsRebuilt(self):
+        self.build( create_generator(self.config) )
+        os.remove( self.config.resource_file_path('es') )
+        self.assertEqual( self.build( create_generator(self.config) ), ['es'] )
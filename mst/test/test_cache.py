@@ -0,0 +1,100 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from mst.cache import WorksheetCache
+from mst.loader import LoaderGoogle
+from mst.test import feeds
+from mst.test.reference import Spreadsheet as reference
+from mst.test.fakeclient import FakeClient
+
+class TestWorksheetCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = WorksheetCache(self.directory, max_entries=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testEntryIsValidUntilWorksheetIsUpdated(self):
+        self.assertIsNone( self.cache.get('key', 'od6', 'monday') )
+        self.cache.put('key', 'od6', 'monday', [['type'], ['string']])
+        self.assertEqual( self.cache.get('key', 'od6', 'monday'), [['type'], ['string']] )
+        self.assertIsNone( self.cache.get('key', 'od6', 'tuesday') )
+
+    def testEntriesAreKeyedByProjection(self):
+        self.cache.put('key', 'od6', 'monday', [['type']], ['type'])
+        self.assertIsNone( self.cache.get('key', 'od6', 'monday') )
+        self.assertEqual( self.cache.get('key', 'od6', 'monday', ['type']), [['type']] )
+
+    def testLeastRecentlyUsedEntriesAreEvicted(self):
+        self.cache.put('key', 'first', 'monday', [])
+        self.cache.put('key', 'second', 'monday', [])
+        for path, used in self.cache.entries():
+            os.utime(path, (used - 100, used - 100))
+        self.assertEqual( self.cache.get('key', 'first', 'monday'), [] )
+        self.cache.put('key', 'third', 'monday', [])
+        self.assertEqual( len( self.cache.entries() ), 2 )
+        self.assertIsNone( self.cache.get('key', 'second', 'monday') )
+        self.assertEqual( self.cache.get('key', 'first', 'monday'), [] )
+
+    def testExpiredEntriesAreEvicted(self):
+        cache = WorksheetCache(self.directory, max_age=60)
+        cache.put('key', 'od6', 'monday', [])
+        for path, used in cache.entries():
+            os.utime(path, (used - 120, used - 120))
+        cache.evict()
+        self.assertEqual( cache.entries(), [] )
+
+    def testBrokenEntryIsMiss(self):
+        self.cache.put('key', 'od6', 'monday', [])
+        for path, used in self.cache.entries():
+            with open(path, 'w') as f:
+                f.write('{broken')
+        self.assertIsNone( self.cache.get('key', 'od6', 'monday') )
+
+class TestLoaderGoogleCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = WorksheetCache(self.directory)
+        self.client = FakeClient( feeds.matrix_from_csv(reference.csv_file) )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def load(self):
+        with mock.patch('mst.gspread.login', return_value=self.client):
+            return LoaderGoogle('user', 'password', 'reference', cache=self.cache)
+
+    def testCellsAreDownloadedOnlyWhenWorksheetChanges(self):
+        first = self.load()
+        self.assertFalse( first.cached )
+        self.assertEqual( len(self.client.requests), 1 )
+        second = self.load()
+        self.assertTrue( second.cached )
+        self.assertEqual( second.data, first.data )
+        self.assertEqual( len(self.client.requests), 1 )
+        self.client.updated = '2014-02-01T00:00:00.000Z'
+        self.assertFalse( self.load().cached )
+        self.assertEqual( len(self.client.requests), 2 )
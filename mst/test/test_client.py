@@ -0,0 +1,86 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+import unittest
+from unittest import mock
+from mst.gspread.client import Client
+from mst.gspread.exceptions import SpreadsheetNotFound, WorksheetNotFound
+from mst.test import feeds
+from mst.test.httpstub import StubServer
+
+class TestSpreadsheetIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(etags=False)
+        self.patch = mock.patch('mst.gspread.urls.SPREADSHEETS_FEED_URL', self.server.url('/feeds/'))
+        self.patch.start()
+        self.titles = ['reference', 'other', 'reference']
+        self.server.bodies['/feeds/spreadsheets/private/full'] = lambda params: feeds.spreadsheets_feed(self.titles)
+        self.client = Client(('user', 'password'))
+
+    def tearDown(self):
+        self.client.session.pool.clear()
+        self.patch.stop()
+        self.server.close()
+
+    def feed_requests(self):
+        return len([r for r in self.server.requests if r[1] == '/feeds/spreadsheets/private/full'])
+
+    def testRepeatedOpensUseOneFeedDownload(self):
+        self.assertEqual( self.client.open('reference').id, 'refkey' )
+        self.assertEqual( self.client.open('other').id, 'refkey1' )
+        self.assertEqual( self.client.open_by_key('refkey2').id, 'refkey2' )
+        self.assertEqual( self.client.open_by_url('https://docs.google.com/spreadsheet/ccc?key=refkey1').id, 'refkey1' )
+        self.assertEqual( [s.id for s in self.client.openall('reference')], ['refkey', 'refkey2'] )
+        self.assertEqual( len(self.client.openall()), 3 )
+        self.assertEqual( self.feed_requests(), 1 )
+
+    def testIndexExpires(self):
+        self.client.index_ttl = -1
+        self.client.open('reference')
+        self.client.open('reference')
+        self.assertEqual( self.feed_requests(), 2 )
+
+    def testInvalidatedIndexIsRebuilt(self):
+        self.client.open('reference')
+        self.client.invalidate_index()
+        self.client.open('reference')
+        self.assertEqual( self.feed_requests(), 2 )
+
+    def testMissRefreshesIndexOnce(self):
+        self.client.open('reference')
+        self.titles.append('created')
+        self.assertEqual( self.client.open('created').id, 'refkey3' )
+        with self.assertRaises(SpreadsheetNotFound):
+            self.client.open('missing')
+        self.assertEqual( self.feed_requests(), 3 )
+
+    def testMissOnFreshIndexDoesNotRefresh(self):
+        with self.assertRaises(SpreadsheetNotFound):
+            self.client.open_by_key('missing')
+        self.assertEqual( self.feed_requests(), 1 )
+
+    def testWorksheetLookup(self):
+        path = '/feeds/worksheets/%s/private/full' % feeds.SPREADSHEET_KEY
+        self.server.bodies[path] = feeds.worksheets_feed([('strings', 10, 5), ('other', 1, 1), ('strings', 2, 2)])
+        spreadsheet = self.client.open('reference')
+        self.assertEqual( spreadsheet.worksheet('strings').id, feeds.WORKSHEET_ID )
+        self.assertEqual( spreadsheet.worksheet('other').id, 'od7' )
+        with self.assertRaises(WorksheetNotFound):
+            spreadsheet.worksheet('missing')
+        self.assertEqual( len([r for r in self.server.requests if r[1] == path]), 1 )
@@ -0,0 +1,45 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+import unittest
+from mst import Spreadsheet, Factory
+from mst.test.reference import Spreadsheet as reference, resource_file
+
+class TestAndroidXmlGoldenFiles(unittest.TestCase):
+    """
+    Compare output of android_xml generator with golden files. Golden
+    files were produced by the previous, minidom based implementation.
+    """
+
+    def assertGolden(self, csv_file, languages, name):
+        sheet = Spreadsheet('android_id', csv_file, languages)
+        generator = Factory.create_generator(Factory.GENERATOR_ANDROID_XML)
+        generator.add_resources( sheet.get_all_resources() )
+        for language in languages:
+            with open( resource_file('golden', '%s_%s.xml' % (name, language)), 'r' ) as f:
+                self.assertEqual( generator.render(language), f.read() )
+
+    def testReferenceSpreadsheet(self):
+        self.assertGolden(reference.csv_file, reference.languages, 'ref')
+
+    def testSpecialCharacters(self):
+        self.assertGolden(resource_file('golden', 'special.csv'), ['en'], 'special')
+
+    def testEmptyDocument(self):
+        generator = Factory.create_generator(Factory.GENERATOR_ANDROID_XML)
+        self.assertEqual( generator.render('en'), '<?xml version="1.0" ?>\n<resources/>\n' )
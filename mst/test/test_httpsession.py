@@ -0,0 +1,180 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+import gzip
+import io
+import tracemalloc
+import unittest
+import zlib
+from email.message import Message
+from mst.gspread.httpsession import HTTPSession, HTTPError
+from mst.test.httpstub import StubServer
+
+class TestConditionalRequests(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer()
+        self.server.bodies['/feed'] = b'<feed>first</feed>'
+        self.session = HTTPSession()
+
+    def tearDown(self):
+        self.server.close()
+
+    def get(self, path='/feed'):
+        return self.session.get( self.server.url(path) )
+
+    def testUnchangedFeedIsServedFromRememberedBody(self):
+        self.assertEqual( self.get().read(), b'<feed>first</feed>' )
+        r = self.get()
+        self.assertEqual( r.read(), b'<feed>first</feed>' )
+        self.assertEqual( r.getcode(), 200 )
+        first, second = self.server.requests
+        self.assertNotIn( 'If-None-Match', first[2] )
+        self.assertEqual( second[2]['If-None-Match'], r.info()['ETag'] )
+
+    def testChangedFeedIsDownloaded(self):
+        self.get().read()
+        self.server.bodies['/feed'] = b'<feed>second</feed>'
+        self.assertEqual( self.get().read(), b'<feed>second</feed>' )
+        self.assertEqual( self.get().read(), b'<feed>second</feed>' )
+
+    def testLastModifiedValidator(self):
+        self.server.etags = False
+        self.server.last_modified = True
+        self.get().read()
+        self.assertEqual( self.get().read(), b'<feed>first</feed>' )
+        self.assertIn( 'If-Modified-Since', self.server.requests[1][2] )
+
+    def testModificationForgetsValidators(self):
+        self.get().read()
+        self.session.put( self.server.url('/feed'), '<entry/>' ).read()
+        self.get().read()
+        self.assertNotIn( 'If-None-Match', self.server.requests[2][2] )
+
+    def testNewCredentialsForgetValidators(self):
+        self.get().read()
+        self.session.add_header('Authorization', 'GoogleLogin auth=other')
+        self.get().read()
+        self.assertNotIn( 'If-None-Match', self.server.requests[1][2] )
+
+    def testNumberOfRememberedResponsesIsBounded(self):
+        self.session.max_validators = 1
+        self.server.bodies['/other'] = b'<feed/>'
+        self.get().read()
+        self.get('/other').read()
+        self.assertEqual( list(self.session.validators), [self.server.url('/other')] )
+
+    def testLargeBodyIsStreamedAndNotRemembered(self):
+        body = b'<feed>%s</feed>' % (b'x' * 5000)
+        self.server.bodies['/feed'] = body
+        self.session.max_body_size = 1000
+        r = self.get()
+        self.assertEqual( r.read(10), body[:10] )
+        self.assertEqual( r.read(), body[10:] )
+        self.assertEqual( len( self.session.validators ), 0 )
+        self.assertEqual( self.get().read(), body )
+        self.assertNotIn( 'If-None-Match', self.server.requests[1][2] )
+
+    def testMemoryIsBoundedForLargeBody(self):
+        body = b'<feed>%s</feed>' % (b'x' * (8 * 1024 * 1024))
+        self.server.bodies['/feed'] = body
+        tracemalloc.start()
+        try:
+            r = self.get()
+            while r.read(64 * 1024):
+                pass
+            size, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess( peak * 10, len(body) )
+
+    def testErrorsAreRaised(self):
+        with self.assertRaises(HTTPError) as error:
+            self.get('/missing')
+        self.assertEqual( error.exception.code, 404 )
+
+class FailingPool(object):
+
+    def __init__(self, error):
+        self.error = error
+
+    def urlopen(self, method, url, body=None, headers=None):
+        raise self.error
+
+class TestCompression(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(etags=False)
+        self.server.bodies['/feed'] = b''.join(b'<entry>%d</entry>' % i for i in range(5000))
+        self.session = HTTPSession()
+
+    def tearDown(self):
+        self.server.close()
+
+    def get(self):
+        return self.session.get( self.server.url('/feed') )
+
+    def testEncodingsAreAdvertised(self):
+        self.get().read()
+        self.assertEqual( self.server.requests[0][2]['Accept-Encoding'], 'gzip, deflate' )
+
+    def testGzipIsDecompressed(self):
+        self.server.encodings = ('gzip',)
+        self.assertEqual( self.get().read(), self.server.bodies['/feed'] )
+        self.assertLess( self.server.sent * 5, len(self.server.bodies['/feed']) )
+
+    def testDeflateIsDecompressed(self):
+        self.server.encodings = ('deflate',)
+        self.assertEqual( self.get().read(), self.server.bodies['/feed'] )
+
+    def testBodyIsReadInChunks(self):
+        self.server.encodings = ('gzip',)
+        r = self.get()
+        chunks = iter(lambda: r.read(1000), b'')
+        self.assertEqual( b''.join(chunks), self.server.bodies['/feed'] )
+
+    def testCompressedBodyIsRemembered(self):
+        self.server.etags = True
+        self.server.encodings = ('gzip',)
+        self.get().read()
+        self.assertEqual( self.get().read(), self.server.bodies['/feed'] )
+
+    def testCompressionCanBeDisabled(self):
+        self.server.encodings = ('gzip',)
+        self.session.compress = False
+        self.assertEqual( self.get().read(), self.server.bodies['/feed'] )
+        self.assertEqual( self.server.requests[0][2]['Accept-Encoding'], 'identity' )
+
+    def testRawDeflateIsDecompressed(self):
+        compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        content = compressor.compress(b'Error=BadAuthentication') + compressor.flush()
+        headers = Message()
+        headers['Content-Encoding'] = 'deflate'
+        session = HTTPSession(pool=FailingPool(HTTPError('http://x', 403, 'Forbidden', headers, io.BytesIO(content))))
+        with self.assertRaises(HTTPError) as error:
+            session.post('http://x', {'Email': 'user'})
+        self.assertEqual( error.exception.read(), b'Error=BadAuthentication' )
+
+    def testErrorBodyIsDecompressed(self):
+        headers = Message()
+        headers['Content-Encoding'] = 'gzip'
+        error = HTTPError('http://x', 403, 'Forbidden', headers, io.BytesIO(gzip.compress(b'Error')))
+        session = HTTPSession(pool=FailingPool(error))
+        with self.assertRaises(HTTPError) as raised:
+            session.get('http://x')
+        self.assertEqual( raised.exception.read(), b'Error' )
@@ -18,9 +18,14 @@
 
 import unittest
 import os
+from unittest import mock
+from mst.exceptions import MstException
 from mst.loader import LoaderCsv
 from mst.loader import LoaderGoogle
+from mst.spreadsheet import Spreadsheet
+from mst.test import feeds
 from mst.test.reference import Spreadsheet as reference
+from mst.test.fakeclient import FakeClient
 
 class TestLoaderCsv(unittest.TestCase):
 
@@ -33,6 +38,43 @@ class TestLoaderCsv(unittest.TestCase):
         data = loader.data
         self.assertEquals( len(data), reference.total_rows, 'Expected to load data from file')
 
+    def testStreamingLoaderReadsRowsLazily(self):
+        loader = LoaderCsv( self.__reference_csv(), streaming=True )
+        self.assertEqual( loader.data, [] )
+        rows = loader.stream()
+        self.assertEqual( next(rows)[0], 'type' )
+        self.assertEqual( len( list(rows) ) + 1, reference.total_rows )
+        self.assertEqual( loader.rows, reference.total_rows )
+
+    def testStreamingLoaderFeedsSpreadsheet(self):
+        loader = LoaderCsv( self.__reference_csv(), streaming=True )
+        sheet = Spreadsheet('android_id', loader.stream(), reference.languages)
+        self.assertEqual( len( sheet.data ), 0 )
+        self.assertEqual( len( sheet.get_all_resources() ), reference.total_resources )
+
+    def testLoaderProjectsColumns(self):
+        columns = ['options', 'android_id', 'type', 'fr']
+        for streaming in (False, True):
+            loader = LoaderCsv( self.__reference_csv(), streaming, columns=columns )
+            rows = list( loader.stream() )
+            self.assertEqual( rows[0], ['type', 'android_id', 'fr', 'options'] )
+            self.assertEqual( rows[2], ['string', 'string_one', 'un', 'option1; option2; option3'] )
+            self.assertEqual( len(rows), reference.total_rows )
+
+    def testMmapBackendProjectsColumns(self):
+        loader = LoaderCsv( self.__reference_csv(), backend=LoaderCsv.BACKEND_MMAP, columns=['es', 'type'] )
+        rows = list( loader.stream() )
+        self.assertEqual( rows[0], ['type', 'es'] )
+        self.assertEqual( rows[2], ['string', 'uno'] )
+
+    def testMmapBackendFeedsSpreadsheet(self):
+        columns = Spreadsheet.required_columns('android_id', reference.languages)
+        loader = LoaderCsv( self.__reference_csv(), backend=LoaderCsv.BACKEND_MMAP, columns=columns )
+        self.assertTrue( loader.streaming )
+        sheet = Spreadsheet('android_id', loader.stream(), reference.languages)
+        self.assertEqual( len( sheet.get_all_resources() ), reference.total_resources )
+        self.assertEqual( loader.rows, reference.total_rows )
+
 class TestLoaderGoogle(unittest.TestCase):
     
     # modify those to point to your own reference spreadsheet
@@ -47,3 +89,25 @@ class TestLoaderGoogle(unittest.TestCase):
         data = loader.data
         self.assertEqual( len( data ) , reference.total_rows, 'Expected to load data from spreadsheet')
         
+
+class TestLoaderGoogleHeaderProbe(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeClient( feeds.matrix_from_csv(reference.csv_file) )
+
+    def load(self, columns):
+        with mock.patch('mst.gspread.login', return_value=self.client):
+            return LoaderGoogle('user', 'password', 'reference', columns=columns)
+
+    def testHeaderIsProbedBeforeColumns(self):
+        columns = Spreadsheet.required_columns('android_id', reference.languages)
+        loader = self.load(columns)
+        self.assertEqual( self.client.requests[0], {'min-row': 1, 'max-row': 1} )
+        sheet = Spreadsheet('android_id', loader.data, reference.languages)
+        self.assertEqual( len( sheet.get_all_resources() ), reference.total_resources )
+
+    def testMissingColumnFailsAfterHeaderProbe(self):
+        columns = Spreadsheet.required_columns('ios_id', reference.languages)
+        with self.assertRaisesRegex(MstException, "Can't find ios_id column"):
+            self.load(columns)
+        self.assertEqual( self.client.requests, [{'min-row': 1, 'max-row': 1}] )
@@ -0,0 +1,74 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+import csv
+import io
+import os
+import tempfile
+import unittest
+from mst.loader import LoaderCsv
+from mst.mmapcsv import MmapCsvReader, decode_columns
+from mst.test.reference import Spreadsheet as reference
+
+class TestMmapCsvReader(unittest.TestCase):
+
+    TRICKY = 'a,b,c\r\n1,"x,y",3\n\n"multi\nline","q""uote",\n"ab"cd,,\nlast,,'
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w', newline='') as f:
+            f.write(self.TRICKY)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def testRecordsMatchCsvModule(self):
+        expected = list( csv.reader( io.StringIO(self.TRICKY, newline='') ) )
+        self.assertEqual( list( decode_columns( MmapCsvReader(self.path) ) ), expected )
+
+    def testReferenceFileMatchesCsvModule(self):
+        with open(reference.csv_file, 'r') as f:
+            expected = list( csv.reader(f) )
+        self.assertEqual( list( decode_columns( MmapCsvReader(reference.csv_file) ) ), expected )
+
+    def testQuotesInsideFieldsMatchCsvBackend(self):
+        tricky = 'a,b,c\n5" screen,x,y\n "lead,ing",z\nq"uo"te,"ab"c"d,\n"open\nquote",5",\n"no""end'
+        with open(self.path, 'w', newline='') as f:
+            f.write(tricky)
+        expected = list( csv.reader( io.StringIO(tricky, newline='') ) )
+        rows = list( LoaderCsv(self.path, True, LoaderCsv.BACKEND_CSV).stream() )
+        mapped = list( LoaderCsv(self.path, True, LoaderCsv.BACKEND_MMAP).stream() )
+        self.assertEqual( rows, expected )
+        self.assertEqual( mapped, expected )
+
+    def testOnlyRequestedColumnsAreDecoded(self):
+        rows = list( decode_columns( MmapCsvReader(self.path), ['b'] ) )
+        self.assertEqual( rows[0], ['a', 'b', 'c'] )
+        self.assertEqual( rows[1], [b'1', 'x,y', b'3'] )
+        self.assertEqual( rows[2], [] )
+
+    def testProjectedRecords(self):
+        rows = list( decode_columns( MmapCsvReader(self.path), ['c', 'a'], project=True ) )
+        self.assertEqual( rows[0], ['a', 'c'] )
+        self.assertEqual( rows[1], ['1', '3'] )
+        self.assertEqual( rows[2], ['', ''] )
+
+    def testEmptyFile(self):
+        with open(self.path, 'w'):
+            pass
+        self.assertEqual( list( decode_columns( MmapCsvReader(self.path) ) ), [] )
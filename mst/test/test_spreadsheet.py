@@ -85,3 +85,24 @@ class SpreadsheetTest(unittest.TestCase):
                 for quantity, reference_option in zip( QuantityStrings.QUANTITIES, reference.quantity_strings_options ):
                     item = quantity_items[quantity]
                     self.assertEqual(item.options, [reference_option] )
+
+    def testResourcesAreParsedOnce(self):
+        s = self.__test_spreadsheet()
+        first = s.get_all_resources()
+        second = s.get_all_resources()
+        self.assertEqual( len(first), len(second) )
+        for a, b in zip(first, second):
+            self.assertIs(a, b)
+
+    def testReturnedListsAreCopies(self):
+        s = self.__test_spreadsheet()
+        s.get_strings().clear()
+        self.assertEqual( len( s.get_strings() ), reference.string_rows )
+
+    def testLanguageColumnsAreNotShared(self):
+        s = self.__test_spreadsheet()
+        header = ['type', 'android_id', 'options', 'de']
+        other = Spreadsheet('android_id', [header], ['de'])
+        self.assertEqual( other.language_column('de'), 3 )
+        self.assertRaises( KeyError, other.language_column, 'en' )
+        self.assertEqual( s.language_column('en'), reference.language_columns['en'] )
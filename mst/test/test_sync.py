@@ -0,0 +1,124 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+import unittest
+from unittest import mock
+from mst.exceptions import MstException
+from mst.gspread.client import Client
+from mst.gspread.exceptions import UpdateCellError
+from mst.gspread.ns import ATOM_NS, BATCH_NS
+from mst.resources import String, StringArray, QuantityStrings
+from mst.sync import WorksheetSync
+from mst.test import feeds
+from mst.test.httpstub import StubServer
+
+HEADER = ['type', 'android_id', 'options', 'en', 'pl']
+
+class TestWorksheetSync(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(etags=False)
+        self.patch = mock.patch('mst.gspread.urls.SPREADSHEETS_FEED_URL', self.server.url('/feeds/'))
+        self.patch.start()
+        self.matrix = [HEADER,
+                       ['string', 'hello', '', 'Hello', 'Witaj'],
+                       ['string', 'bye', '', 'Bye', ''],
+                       ['string-array', 'days:0', '', 'Monday', 'Poniedzialek']]
+        self.rows = 10
+        key, worksheet_id = feeds.SPREADSHEET_KEY, feeds.WORKSHEET_ID
+        self.worksheet_path = '/feeds/worksheets/%s/private/full/%s' % (key, worksheet_id)
+        self.batch_path = '/feeds/cells/%s/%s/private/full/batch' % (key, worksheet_id)
+        self.server.bodies['/feeds/spreadsheets/private/full'] = feeds.spreadsheets_feed(['reference'])
+        self.server.bodies['/feeds/worksheets/%s/private/full' % key] = lambda params: feeds.worksheets_feed([('strings', self.rows, len(HEADER))])
+        self.server.bodies['/feeds/cells/%s/%s/private/full' % (key, worksheet_id)] = lambda params: feeds.cells_feed(self.matrix, params)
+        self.server.bodies[self.worksheet_path] = lambda params: self.worksheet_entry()
+        self.server.bodies[self.worksheet_path + '/version1'] = lambda params: self.worksheet_entry()
+        self.server.bodies[self.batch_path] = b'<feed xmlns="%s"/>' % ATOM_NS.encode()
+        self.client = Client(('user', 'password'))
+        self.worksheet = self.client.open('reference').worksheet('strings')
+
+    def tearDown(self):
+        self.client.session.pool.clear()
+        self.patch.stop()
+        self.server.close()
+
+    def worksheet_entry(self):
+        return feeds.tostring( feeds.worksheet_entry('strings', self.rows, len(HEADER)) )
+
+    def batches(self):
+        return [feeds.batch_cells(body) for method, path, headers, body in self.server.requests if path == self.batch_path]
+
+    def sent_cells(self):
+        return sorted( cell for batch in self.batches() for cell in batch )
+
+    def sync(self, **kwargs):
+        return WorksheetSync(self.worksheet, 'android_id', ['en', 'pl'], **kwargs)
+
+    def string(self, key, en, pl):
+        resource = String(key, ['en', 'pl'])
+        resource.add('en', en)
+        resource.add('pl', pl)
+        return resource
+
+    def testOnlyChangedCellsAreSent(self):
+        resources = [self.string('hello', 'Hello', 'Czesc'), self.string('bye', 'Bye', 'Pa')]
+        self.assertEqual( self.sync().sync(resources), 2 )
+        self.assertEqual( self.sent_cells(), [(2, 5, 'Czesc'), (3, 5, 'Pa')] )
+
+    def testUnchangedResourcesSendNothing(self):
+        self.assertEqual( self.sync().sync([self.string('hello', 'Hello', 'Witaj')]), 0 )
+        self.assertEqual( self.batches(), [] )
+
+    def testEmptyTextsDoNotOverwriteCells(self):
+        self.assertEqual( self.sync().diff([self.string('hello', '', '')]), [] )
+
+    def testNewKeysAreAppended(self):
+        array = StringArray('days', ['en', 'pl'])
+        array.add('en', 0, 'Monday')
+        array.add('pl', 0, 'Poniedzialek')
+        array.add('en', 1, 'Tuesday')
+        plurals = QuantityStrings('apples', ['en'])
+        plurals.add_quantity_string('en', QuantityStrings.ONE, 'apple')
+        self.sync().sync([array, plurals])
+        self.assertEqual( self.sent_cells(), [(5, 1, 'string-array'), (5, 2, 'days:1'), (5, 4, 'Tuesday'),
+                                              (6, 1, 'plurals'), (6, 2, 'apples:one'), (6, 4, 'apple')] )
+
+    def testWorksheetIsResizedForNewRows(self):
+        self.rows = 4
+        self.worksheet = self.client.open('reference').worksheet('strings')
+        self.sync().sync([self.string('new', 'New', '')])
+        puts = [r for r in self.server.requests if r[0] == 'PUT']
+        self.assertEqual( len( puts ), 1 )
+        self.assertIn( b'<ns1:rowCount>5</ns1:rowCount>', puts[0][3] )
+
+    def testChangesAreSentInParallelChunks(self):
+        self.server.latency = 0.1
+        resources = [self.string('key%d' % i, 'Text %d' % i, '') for i in range(6)]
+        self.assertEqual( self.sync(chunk_size=4, workers=3).sync(resources, self.matrix), 18 )
+        self.assertEqual( sorted( len(batch) for batch in self.batches() ), [2] + [4] * 4 )
+        self.assertGreater( self.server.max_in_flight, 1 )
+
+    def testRejectedBatchRaises(self):
+        self.server.bodies[self.batch_path] = ('<feed xmlns="%s" xmlns:batch="%s"><entry>'
+                                               '<batch:id>A2</batch:id><batch:status code="409" reason="Conflict"/>'
+                                               '</entry></feed>' % (ATOM_NS, BATCH_NS)).encode()
+        with self.assertRaises(UpdateCellError):
+            self.sync().sync([self.string('hello', 'Hi', '')])
+
+    def testMissingHeaderColumnRaises(self):
+        with self.assertRaises(MstException):
+            WorksheetSync(self.worksheet, 'ios_id', ['en']).diff([], self.matrix)
@@ -0,0 +1,74 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+import os
+import shutil
+import tempfile
+import unittest
+from mst.utils import write_file, open_file
+
+class TestAtomicFile(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'res', 'values', 'strings.xml')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def read(self):
+        with open(self.path, 'r') as f:
+            return f.read()
+
+    def testNewFileIsWritten(self):
+        self.assertTrue( write_file(self.path, 'text') )
+        self.assertEqual( self.read(), 'text' )
+        self.assertEqual( os.listdir( os.path.dirname(self.path) ), ['strings.xml'] )
+
+    def testUnchangedFileIsNotTouched(self):
+        write_file(self.path, 'text')
+        os.utime(self.path, (1000000000, 1000000000))
+        self.assertFalse( write_file(self.path, 'text') )
+        self.assertEqual( os.path.getmtime(self.path), 1000000000 )
+        self.assertEqual( os.listdir( os.path.dirname(self.path) ), ['strings.xml'] )
+
+    def testChangedFileIsReplaced(self):
+        write_file(self.path, 'text')
+        self.assertTrue( write_file(self.path, 'texT') )
+        self.assertEqual( self.read(), 'texT' )
+        self.assertTrue( write_file(self.path, 'longer text') )
+        self.assertEqual( self.read(), 'longer text' )
+
+    def testTargetIsUntouchedUntilClosed(self):
+        write_file(self.path, 'old')
+        f = open_file(self.path)
+        f.write('new')
+        self.assertEqual( self.read(), 'old' )
+        f.close()
+        self.assertEqual( self.read(), 'new' )
+
+    def testFailedWriteKeepsOldContents(self):
+        write_file(self.path, 'old')
+        try:
+            with open_file(self.path) as f:
+                f.write('partial')
+                raise RuntimeError('generation failed')
+        except RuntimeError:
+            pass
+        self.assertEqual( self.read(), 'old' )
+        self.assertEqual( os.listdir( os.path.dirname(self.path) ), ['strings.xml'] )
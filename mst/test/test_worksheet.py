@@ -0,0 +1,252 @@
+#     This file is part of Mobile Strings Toolkit
+#     
+#     Copyright (C) 2013 Krzysztof Narkiewicz <krzysztof.narkiewicz@ezaquarii.com>
+#     
+#     Mobile Strings Toolkit is free software; you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation; either version 2 of the License, or
+#     (at your option) any later version.
+#     
+#     Mobile Strings Toolkit is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     
+#     You should have received a copy of the GNU General Public License
+#     along with Mobile Strings Toolkit; if not, write to the Free Software
+#     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+import io
+import re
+import tracemalloc
+import unittest
+import weakref
+from urllib.parse import parse_qsl
+from unittest import mock
+from mst.gspread.client import Client
+from mst.gspread.exceptions import CellNotFound
+from mst.gspread.models import Cell
+from mst.gspread.utils import iter_cells, dense_matrix
+from mst.test import feeds
+from mst.test.fakeclient import fake_worksheet
+from mst.test.httpstub import StubServer
+from mst.test.reference import Spreadsheet as reference
+
+def listed(values):
+    """Values as returned by row_values and col_values"""
+    values = [value or None for value in values]
+    while values and values[-1] is None:
+        values.pop()
+    return values
+
+class TestWorksheet(unittest.TestCase):
+
+    def setUp(self):
+        self.matrix = feeds.matrix_from_csv(reference.csv_file)
+        self.worksheet = fake_worksheet(self.matrix)
+
+    def testGetAllValues(self):
+        self.assertEqual( self.worksheet.get_all_values(), self.matrix )
+
+    def testAppendRowsUsesConstantNumberOfRequests(self):
+        rows = [['new', 'row'], ['wider', 'row', 'with', 'more', 'values', 'than', 'columns', 'in', 'sheet', 'x', 'y', 'z']]
+        self.worksheet.append_rows(rows)
+        client = self.worksheet.client
+        self.assertEqual( client.calls, ['get_feed', 'put_feed', 'get_cells_feed', 'post_cells'] )
+        self.assertEqual( client.requests[-1], {'range': 'A32:L33', 'return-empty': 'true'} )
+        self.assertEqual( (self.worksheet.row_count, self.worksheet.col_count), (33, 12) )
+        self.assertEqual( client.matrix[-2:], rows )
+
+    def testAppendRow(self):
+        rows = self.worksheet.row_count
+        self.worksheet.append_row(['new', 'row'])
+        self.assertEqual( self.worksheet.client.matrix[-1], ['new', 'row'] )
+        self.assertEqual( self.worksheet.row_count, rows + 1 )
+
+    def testGetColsValuesFetchesAdjacentColumnsTogether(self):
+        cols = [reference.id_column + 1, reference.type_column + 1, 6]
+        rows = self.worksheet.get_cols_values(cols)
+        self.assertEqual( rows, [[row[c - 1] for c in cols] for row in self.matrix] )
+        self.assertEqual( self.worksheet.client.requests, [{'min-col': 1, 'max-col': 2}, {'min-col': 6, 'max-col': 6}] )
+
+    def testRowValuesRequestsOneRow(self):
+        self.assertEqual( self.worksheet.row_values(1), self.matrix[0] )
+        self.assertEqual( self.worksheet.client.requests, [{'min-row': 1, 'max-row': 1}] )
+
+    def testColValuesRequestsOneColumn(self):
+        col = reference.id_column + 1
+        self.assertEqual( self.worksheet.col_values(col), listed([row[col - 1] for row in self.matrix]) )
+        self.assertEqual( self.worksheet.client.requests, [{'min-col': col, 'max-col': col}] )
+
+    def testRowValuesUseSnapshot(self):
+        self.worksheet.snapshot()
+        self.assertEqual( self.worksheet.row_values(3), listed(self.matrix[2]) )
+        self.assertEqual( self.worksheet.row_values(len(self.matrix) + 5), [] )
+        self.assertEqual( len( self.worksheet.client.requests ), 1 )
+
+class TestWorksheetSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.matrix = feeds.matrix_from_csv(reference.csv_file)
+        self.worksheet = fake_worksheet(self.matrix)
+
+    def downloads(self):
+        return self.worksheet.client.calls.count('get_cells_feed')
+
+    def testLookupsShareOneDownload(self):
+        keys = [row[reference.id_column] for row in self.matrix[1:] if row[reference.id_column]]
+        for key in keys:
+            self.assertEqual( self.worksheet.find(key).value, key )
+        pattern = re.compile('^string')
+        self.assertEqual( len( self.worksheet.findall(pattern) ),
+                          len([value for row in self.matrix for value in row if pattern.search(value)]) )
+        with self.assertRaises(CellNotFound):
+            self.worksheet.find('missing key')
+        self.assertEqual( self.downloads(), 1 )
+
+    def testExactMatchReturnsCellsInFeedOrder(self):
+        cells = self.worksheet.findall('string')
+        self.assertEqual( [(c.row, c.col) for c in cells], sorted((c.row, c.col) for c in cells) )
+        self.assertEqual( self.worksheet.find('string'), cells[0] )
+
+    def testColumnIndex(self):
+        snapshot = self.worksheet.snapshot()
+        col = reference.type_column + 1
+        self.assertTrue( all(cell.col == col for cell in snapshot.findall('string', col=col)) )
+        self.assertEqual( snapshot.findall('string', col=col + 1), [] )
+        self.assertEqual( snapshot.find(re.compile('array'), col=col).col, col )
+        with self.assertRaises(CellNotFound):
+            snapshot.find('string', col=col + 1)
+
+    def testUpdateInvalidatesSnapshot(self):
+        self.worksheet.find('string')
+        self.worksheet.update_values([(1, 1, 'renamed')])
+        self.assertEqual( self.worksheet.find('renamed').row, 1 )
+        self.assertEqual( self.downloads(), 2 )
+
+    def testRefresh(self):
+        snapshot = self.worksheet.snapshot()
+        self.assertIs( self.worksheet.snapshot(), snapshot )
+        self.assertIsNot( self.worksheet.snapshot(refresh=True), snapshot )
+
+class TestCellsStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.matrix = feeds.matrix_from_csv(reference.csv_file)
+
+    def testCellsAreYieldedInFeedOrder(self):
+        cells = list( iter_cells( io.BytesIO( feeds.cells_feed(self.matrix) ) ) )
+        expected = [(r + 1, c + 1, value) for r, row in enumerate(self.matrix)
+                                          for c, value in enumerate(row) if value]
+        self.assertEqual( cells, expected )
+
+    def testParsedEntriesAreReleased(self):
+        matrix = [['cell %d %d' % (r, c) for c in range(10)] for r in range(1000)]
+        feed = feeds.cells_feed(matrix)
+        with StubServer(etags=True) as server, mock.patch('mst.gspread.urls.SPREADSHEETS_FEED_URL', server.url('/feeds/')):
+            worksheet = fake_worksheet(matrix)
+            client = Client(('user', 'password'))
+            path = '/feeds/cells/%s/%s/private/full' % (feeds.SPREADSHEET_KEY, feeds.WORKSHEET_ID)
+            # download once untraced, so one-off allocations are not counted
+            server.bodies[path] = feeds.cells_feed(matrix[:1])
+            list( client.iter_cells_feed(worksheet) )
+            server.bodies[path] = feed
+            tracemalloc.start()
+            try:
+                count = sum(1 for cell in client.iter_cells_feed(worksheet))
+                size, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            client.session.pool.clear()
+        self.assertEqual( count, 10000 )
+        self.assertLess( peak * 10, len(feed) )
+
+    def testClientStreamsCellsFeedFromServer(self):
+        with StubServer() as server, mock.patch('mst.gspread.urls.SPREADSHEETS_FEED_URL', server.url('/feeds/')):
+            server.encodings = ('gzip',)
+            worksheet = fake_worksheet(self.matrix)
+            worksheet.client = Client(('user', 'password'))
+            path = '/feeds/cells/%s/%s/private/full' % (feeds.SPREADSHEET_KEY, feeds.WORKSHEET_ID)
+            server.bodies[path] = feeds.cells_feed(self.matrix)
+            self.assertEqual( worksheet.get_all_values(), self.matrix )
+            worksheet.client.session.pool.clear()
+
+class TestBandedDownload(unittest.TestCase):
+
+    def setUp(self):
+        self.matrix = feeds.matrix_from_csv(reference.csv_file)
+        self.server = StubServer()
+        self.server.latency = 0.05
+        path = '/feeds/cells/%s/%s/private/full' % (feeds.SPREADSHEET_KEY, feeds.WORKSHEET_ID)
+        self.server.bodies[path] = lambda params: feeds.cells_feed(self.matrix, params)
+        self.patch = mock.patch('mst.gspread.urls.SPREADSHEETS_FEED_URL', self.server.url('/feeds/'))
+        self.patch.start()
+        self.worksheet = fake_worksheet(self.matrix)
+        self.worksheet.client = Client(('user', 'password'))
+
+    def tearDown(self):
+        self.worksheet.client.session.pool.clear()
+        self.patch.stop()
+        self.server.close()
+
+    def bands(self):
+        queries = [dict(parse_qsl(request[1].split('?')[1])) for request in self.server.requests]
+        return sorted((int(q['min-row']), int(q['max-row'])) for q in queries)
+
+    def testBandsAreDownloadedConcurrently(self):
+        self.assertEqual( self.worksheet.get_all_values(band_rows=8), self.matrix )
+        self.assertEqual( self.bands(), [(1, 8), (9, 16), (17, 24), (25, 31)] )
+        self.assertGreater( self.server.max_in_flight, 1 )
+
+    def testColumnBandsAreDownloadedConcurrently(self):
+        cols = [1, 2, 6]
+        rows = self.worksheet.get_cols_values(cols, band_rows=16, workers=2)
+        self.assertEqual( rows, [[row[c - 1] for c in cols] for row in self.matrix] )
+        self.assertEqual( len(self.server.requests), 4 )
+        self.assertEqual( self.server.max_in_flight, 2 )
+
+    def testSingleWorkerDownloadsBandsInTurn(self):
+        self.assertEqual( self.worksheet.get_all_values(band_rows=8, workers=1), self.matrix )
+        self.assertEqual( len(self.server.requests), 4 )
+        self.assertEqual( self.server.max_in_flight, 1 )
+
+class TestCell(unittest.TestCase):
+
+    def setUp(self):
+        self.worksheet = fake_worksheet([['a', 'b'], ['c', 'd']])
+
+    def testCellDoesNotKeepFeedElement(self):
+        entry = feeds.cell_entry(2, 3, 'value')
+        ref = weakref.ref(entry)
+        cell = Cell(self.worksheet, entry)
+        del entry
+        self.assertIsNone( ref() )
+        self.assertFalse( hasattr(cell, '__dict__') )
+        self.assertEqual( (cell.row, cell.col, cell.value, cell.title), (2, 3, 'value', 'C2') )
+
+    def testUpdateFeedUsesCellLinks(self):
+        cell = Cell(self.worksheet, feeds.cell_entry(1, 2, 'b'))
+        cell.value = 'new'
+        entry = self.worksheet._create_update_feed([cell]).find('entry')
+        self.assertEqual( entry.find('batch:id').text, 'B1' )
+        self.assertEqual( entry.find('id').text, cell.id )
+        self.assertEqual( entry.find('link').get('href'), cell.id + '/1' )
+        self.assertEqual( entry.find('link').get('type'), 'application/atom+xml' )
+        self.assertEqual( entry.find('gs:cell').get('inputValue'), 'new' )
+
+class TestDenseMatrix(unittest.TestCase):
+
+    def testMatrixSpansToLastCell(self):
+        cells = [(1, 1, 'a'), (3, 2, 'b'), (2, 4, 'c')]
+        self.assertEqual( dense_matrix(cells), [['a', '', '', ''], ['', '', '', 'c'], ['', 'b', '', '']] )
+
+    def testColumnsArePaddedToMinimum(self):
+        self.assertEqual( dense_matrix(iter([(1, 1, 'a')]), 3), [['a', '', '']] )
+
+    def testNoCells(self):
+        self.assertEqual( dense_matrix([]), [] )
+
+    def testLargeGridReturnsFilledExtent(self):
+        worksheet = fake_worksheet([['a', ''], ['', 'b']])
+        worksheet._element = feeds.worksheet_entry('strings', 100000, 500)
+        self.assertEqual( worksheet.get_all_values(), [['a', ''], ['', 'b']] )
@@ -16,7 +16,103 @@
 #     along with Mobile Strings Toolkit; if not, write to the Free Software
 #     Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 
+import os
+import shutil
+import uuid
+
 def ellipsis(object, length=10):
     string = str(object)
     return (string[:length] + '...') if len(string) > length else string
 
+class AtomicFile(object):
+    """
+    Text file written atomically. Data is written to a temporary file
+    in the target directory. When closed, temporary file replaces the
+    target only if contents differ, so unchanged files keep their
+    modification time and readers never see partially written files.
+    Nothing is replaced if the file is closed due to an exception.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, file):
+        self.__path = file
+        directory, name = os.path.split(file)
+        self.__temp_path = os.path.join(directory, '.%s.%s.tmp' % (name, uuid.uuid4().hex))
+        self.__file = open(self.__temp_path, 'x')
+        self.__changed = None
+
+    @property
+    def path(self):
+        return self.__path
+
+    @property
+    def changed(self):
+        """True if target was replaced, False if contents were identical, None if file is open"""
+        return self.__changed
+
+    def write(self, text):
+        return self.__file.write(text)
+
+    def close(self):
+        if self.__file.closed:
+            return
+        self.__file.close()
+        if self.__same_contents():
+            os.remove(self.__temp_path)
+            self.__changed = False
+        else:
+            # keep permissions of replaced file
+            if os.path.exists(self.path):
+                shutil.copymode(self.path, self.__temp_path)
+            os.replace(self.__temp_path, self.path)
+            self.__changed = True
+
+    def discard(self):
+        """Close the file and remove temporary file, leaving target untouched"""
+        self.__file.close()
+        if os.path.exists(self.__temp_path):
+            os.remove(self.__temp_path)
+
+    def __same_contents(self):
+        try:
+            if os.path.getsize(self.path) != os.path.getsize(self.__temp_path):
+                return False
+            with open(self.path, 'rb') as old, open(self.__temp_path, 'rb') as new:
+                while True:
+                    old_chunk = old.read(self.CHUNK_SIZE)
+                    if old_chunk != new.read(self.CHUNK_SIZE):
+                        return False
+                    if not old_chunk:
+                        return True
+        except OSError:
+            return False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+def open_file(file):
+    """
+    Open a file for atomic writing. Parent directories are created if
+    needed. It is safe to call it from multiple threads.
+    """
+    directory = os.path.dirname(file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return AtomicFile(file)
+
+def write_file(file, text):
+    """
+    Write text to a file, unless it already has the same contents.
+    Parent directories are created if needed. Returns True if file
+    was written.
+    """
+    with open_file(file) as f:
+        f.write( text )
+    return f.changed